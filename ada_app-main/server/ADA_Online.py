@@ -98,11 +98,7 @@ class ADA:
         }
         
         # Add plugin functions
-        for plugin in self.plugins.values():
-            for func_info in plugin.get_functions():
-                func_name = func_info['name']
-                self.available_functions[func_name] = lambda plugin=plugin, func_name=func_name, **kwargs: \
-                    plugin.execute_function(func_name, **kwargs)
+        self.available_functions.update(plugin_manager.get_function_mapping())
 
         # System behavior prompt (Keep as before)
         self.system_behavior = """
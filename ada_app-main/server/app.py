@@ -7,7 +7,10 @@ from flask import Flask, render_template, request # Make sure request is importe
 from flask_socketio import SocketIO, emit
 
 load_dotenv()
-from ADA_Online import ADA # Make sure filename matches ADA_Online.py
+# Worker processes started with spawn re-import this module as __mp_main__;
+# they only run plugin helpers, so skip the assistant and its ML imports
+if __name__ != '__mp_main__':
+    from ADA_Online import ADA # Make sure filename matches ADA_Online.py
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.getenv('FLASK_SECRET_KEY', 'a_default_fallback_secret_key!')
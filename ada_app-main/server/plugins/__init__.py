@@ -4,6 +4,7 @@ Dynamic plugin discovery and loading for modular feature architecture
 """
 
 import os
+import functools
 import importlib
 import inspect
 from typing import Dict, List, Any, Optional
@@ -36,6 +37,10 @@ class PluginBase(ABC):
     def get_widget_info(self) -> Optional[Dict[str, Any]]:
         """Return frontend widget information if applicable"""
         pass
+    
+    def close(self):
+        """Release resources such as worker pools; called before reloading"""
+        pass
 
 class PluginManager:
     """Manages plugin discovery, loading, and execution"""
@@ -43,20 +48,36 @@ class PluginManager:
     def __init__(self):
         self.plugins: Dict[str, PluginBase] = {}
         self.plugin_dir = os.path.dirname(os.path.abspath(__file__))
+        self._plugin_files: Optional[List[str]] = None
+        self._all_functions: List[Dict[str, Any]] = []
+        self._function_mapping: Dict[str, callable] = {}
+        self._widget_info: Dict[str, Dict[str, Any]] = {}
     
     def discover_plugins(self) -> List[str]:
         """Discover available plugins in the plugins directory"""
-        plugin_files = []
-        for filename in os.listdir(self.plugin_dir):
-            if filename.endswith('.py') and not filename.startswith('__'):
-                plugin_name = filename[:-3]  # Remove .py extension
-                plugin_files.append(plugin_name)
-        return plugin_files
+        if self._plugin_files is None:
+            plugin_files = []
+            with os.scandir(self.plugin_dir) as entries:
+                for entry in entries:
+                    # Underscore-prefixed modules are private helpers, not plugins
+                    if entry.is_file() and entry.name.endswith('.py') and not entry.name.startswith('_'):
+                        plugin_name = entry.name[:-3]  # Remove .py extension
+                        plugin_files.append(plugin_name)
+            self._plugin_files = plugin_files
+        return self._plugin_files
     
     def load_plugins(self) -> Dict[str, PluginBase]:
         """Load all discovered plugins"""
         plugin_names = self.discover_plugins()
         
+        # Instances from a previous load are replaced, so let them clean up
+        for plugin in self.plugins.values():
+            try:
+                plugin.close()
+            except Exception as e:
+                print(f"Failed to close plugin {plugin.get_name()}: {e}")
+        self.plugins = {}
+        
         for plugin_name in plugin_names:
             try:
                 # Import the plugin module
@@ -76,33 +97,35 @@ class PluginManager:
             except Exception as e:
                 print(f"Failed to load plugin {plugin_name}: {e}")
         
+        self._build_registries()
         return self.plugins
     
+    def _build_registries(self):
+        """Precompute function declarations, function mapping and widget info"""
+        self._all_functions = []
+        self._function_mapping = {}
+        self._widget_info = {}
+        for plugin in self.plugins.values():
+            functions = plugin.get_functions()
+            self._all_functions.extend(functions)
+            for func_info in functions:
+                func_name = func_info['name']
+                self._function_mapping[func_name] = functools.partial(plugin.execute_function, func_name)
+            widget_info = plugin.get_widget_info()
+            if widget_info:
+                self._widget_info[plugin.get_name()] = widget_info
+    
     def get_all_functions(self) -> List[Dict[str, Any]]:
         """Get all function declarations from all plugins"""
-        functions = []
-        for plugin in self.plugins.values():
-            functions.extend(plugin.get_functions())
-        return functions
+        return self._all_functions
     
     def get_function_mapping(self) -> Dict[str, callable]:
         """Get mapping of function names to their execution methods"""
-        mapping = {}
-        for plugin in self.plugins.values():
-            for func_info in plugin.get_functions():
-                func_name = func_info['name']
-                mapping[func_name] = lambda plugin=plugin, func_name=func_name, **kwargs: \
-                    plugin.execute_function(func_name, **kwargs)
-        return mapping
+        return self._function_mapping
     
     def get_widget_info(self) -> Dict[str, Dict[str, Any]]:
         """Get all widget information from plugins"""
-        widgets = {}
-        for plugin in self.plugins.values():
-            widget_info = plugin.get_widget_info()
-            if widget_info:
-                widgets[plugin.get_name()] = widget_info
-        return widgets
+        return self._widget_info
 
 # Global plugin manager instance
 plugin_manager = PluginManager()
@@ -0,0 +1,91 @@
+"""
+Request Micro-Batching
+Coalesces concurrent single-item requests into batched calls run off the event loop
+"""
+
+import asyncio
+from typing import Any, Callable, List, Optional
+
+class MicroBatcher:
+    """Coalesces concurrent single-item requests into batched calls
+    
+    Items arriving within max_wait of the first one are collected. Each call
+    takes up to max_batch_size items sharing the oldest item's key (all items
+    share one key when no key function is given); the rest run in the calls
+    that follow.
+    """
+    
+    def __init__(self, batch_func: Callable[[List[Any]], List[Any]], max_batch_size: int,
+                 max_wait: float, key: Optional[Callable[[Any], Any]] = None):
+        self.batch_func = batch_func
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.key = key
+        self._queue = None
+        self._worker = None
+    
+    async def submit(self, item: Any) -> Any:
+        """Queue an item and wait for its result from the next batch"""
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+        
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+    
+    def _key(self, item: Any) -> Any:
+        return self.key(item) if self.key else None
+    
+    async def _collect(self, pending: List[tuple]):
+        """Wait for the first item, then gather more until the window closes
+        or a full batch of the first item's key has arrived"""
+        loop = asyncio.get_running_loop()
+        pending.append(await self._queue.get())
+        deadline = loop.time() + self.max_wait
+        batch_key = self._key(pending[0][0])
+        matching = 1
+        while matching < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                entry = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            pending.append(entry)
+            if self._key(entry[0]) == batch_key:
+                matching += 1
+    
+    async def _run(self):
+        """Drain the queue in batches and run batch_func off the event loop"""
+        pending = []
+        while True:
+            if pending:
+                # Leftovers of the last window run right away, joined by
+                # anything queued since
+                while not self._queue.empty():
+                    pending.append(self._queue.get_nowait())
+            else:
+                await self._collect(pending)
+            
+            batch_key = self._key(pending[0][0])
+            batch, remaining = [], []
+            for entry in pending:
+                if len(batch) < self.max_batch_size and self._key(entry[0]) == batch_key:
+                    batch.append(entry)
+                else:
+                    remaining.append(entry)
+            pending = remaining
+            
+            try:
+                results = await asyncio.to_thread(self.batch_func, [item for item, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
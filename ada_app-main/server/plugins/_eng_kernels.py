@@ -0,0 +1,63 @@
+"""
+Engineering Calculation Kernels
+Array kernels for structural design sweeps, JIT-compiled with Numba when available
+"""
+
+import numpy as np
+
+# Numba is optional; without it the kernels fall back to NumPy vector operations
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+if NUMBA_AVAILABLE:
+    # cache=True stores the compiled machine code on disk so only the first
+    # run after installation pays the compilation cost
+    @njit(parallel=True, cache=True, fastmath=True)
+    def _beam_kernel(load, length, modulus, inertia, out_deflection, out_moment):
+        for i in prange(load.shape[0]):
+            out_deflection[i] = (load[i] * length[i] * length[i] * length[i]) / (3.0 * modulus[i] * inertia[i])
+            out_moment[i] = load[i] * length[i]
+
+    # No fastmath here: the zero-load case produces an infinite safety factor
+    @njit(parallel=True, cache=True)
+    def _buckling_kernel(load, length, modulus, inertia, out_buckling_load, out_safety_factor):
+        pi_sq = np.pi * np.pi
+        for i in prange(load.shape[0]):
+            out_buckling_load[i] = (pi_sq * modulus[i] * inertia[i]) / (length[i] * length[i])
+            if load[i] > 0:
+                out_safety_factor[i] = out_buckling_load[i] / load[i]
+            else:
+                out_safety_factor[i] = np.inf
+else:
+    def _beam_kernel(load, length, modulus, inertia, out_deflection, out_moment):
+        out_deflection[:] = (load * length ** 3) / (3.0 * modulus * inertia)
+        out_moment[:] = load * length
+
+    def _buckling_kernel(load, length, modulus, inertia, out_buckling_load, out_safety_factor):
+        out_buckling_load[:] = (np.pi ** 2 * modulus * inertia) / length ** 2
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out_safety_factor[:] = np.where(load > 0, out_buckling_load / load, np.inf)
+
+def _as_arrays(*values):
+    """Broadcast scalar/array inputs to contiguous float64 arrays of equal length"""
+    arrays = np.broadcast_arrays(*(np.asarray(v, dtype=np.float64) for v in values))
+    return [np.ascontiguousarray(a).ravel() for a in arrays]
+
+def beam_analysis_batch(load, length, modulus, inertia):
+    """Cantilever deflection and maximum moment for each design point"""
+    load, length, modulus, inertia = _as_arrays(load, length, modulus, inertia)
+    deflection = np.empty_like(load)
+    max_moment = np.empty_like(load)
+    _beam_kernel(load, length, modulus, inertia, deflection, max_moment)
+    return deflection, max_moment
+
+def column_buckling_batch(load, length, modulus, inertia):
+    """Euler buckling load and safety factor for each design point"""
+    load, length, modulus, inertia = _as_arrays(load, length, modulus, inertia)
+    buckling_load = np.empty_like(load)
+    safety_factor = np.empty_like(load)
+    _buckling_kernel(load, length, modulus, inertia, buckling_load, safety_factor)
+    return buckling_load, safety_factor
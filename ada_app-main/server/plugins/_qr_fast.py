@@ -0,0 +1,345 @@
+"""
+QR Code Encoding Kernels
+Codeword encoding on int bit buffers, and module placement and mask scoring
+on uint8 grids, JIT-compiled with Numba when available
+"""
+
+from bisect import bisect_left
+from functools import lru_cache
+
+import numpy as np
+from qrcode import LUT, base as qr_base, exceptions as qr_exceptions, util as qr_util
+
+# Numba is optional; without it the mask penalty falls back to NumPy vector operations
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# Finder-like 1:1:3:1:1 pattern with 4 light modules after or before it,
+# as 11-module arrays and as the equivalent 11-bit window values
+_FINDER_PATTERNS = np.array([
+    [1, 0, 1, 1, 1, 0, 1, 0, 0, 0, 0],
+    [0, 0, 0, 0, 1, 0, 1, 1, 1, 0, 1]
+], dtype=np.uint8)
+_FINDER_BEFORE_LIGHT = 0b10111010000
+_FINDER_AFTER_LIGHT = 0b00001011101
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _lost_point_fused_row(mat):
+        # One row-major pass: horizontal runs (rule 1), 2x2 blocks (rule 2),
+        # horizontal finder patterns (rule 3) and the dark count (rule 4)
+        n = mat.shape[0]
+        lost_point = 0
+        dark_count = 0
+        for i in range(n):
+            length = 0
+            window = 0
+            for j in range(n):
+                color = mat[i, j]
+                dark_count += color
+                if j > 0 and color == mat[i, j - 1]:
+                    length += 1
+                else:
+                    if length >= 5:
+                        lost_point += length - 2
+                    length = 1
+                if (i > 0 and j > 0 and color == mat[i, j - 1]
+                        and color == mat[i - 1, j] and color == mat[i - 1, j - 1]):
+                    lost_point += 3
+                window = ((window << 1) | color) & 0x7FF
+                if j >= 10 and (window == _FINDER_BEFORE_LIGHT or window == _FINDER_AFTER_LIGHT):
+                    lost_point += 40
+            if length >= 5:
+                lost_point += length - 2
+        rating = int(abs(dark_count * 100.0 / (n * n) - 50) / 5)
+        return lost_point + rating * 10
+
+    @njit(cache=True)
+    def _lost_point_fused_col(mat):
+        # One column-major pass: vertical runs (rule 1) and finder patterns (rule 3)
+        n = mat.shape[0]
+        lost_point = 0
+        for j in range(n):
+            length = 0
+            window = 0
+            for i in range(n):
+                color = mat[i, j]
+                if i > 0 and color == mat[i - 1, j]:
+                    length += 1
+                else:
+                    if length >= 5:
+                        lost_point += length - 2
+                    length = 1
+                window = ((window << 1) | color) & 0x7FF
+                if i >= 10 and (window == _FINDER_BEFORE_LIGHT or window == _FINDER_AFTER_LIGHT):
+                    lost_point += 40
+            if length >= 5:
+                lost_point += length - 2
+        return lost_point
+else:
+    def _line_penalty(mat):
+        # Rules 1 and 3 along each row of mat; a sentinel column keeps runs
+        # from continuing into the next row
+        n = mat.shape[0]
+        padded = np.full((n, n + 1), 2, dtype=np.int8)
+        padded[:, :n] = mat
+        starts = np.flatnonzero(np.diff(padded.ravel(), prepend=-1))
+        lengths = np.diff(starts, append=padded.size)
+        lost_point = int((lengths[lengths >= 5] - 2).sum())
+
+        if n > 10:
+            windows = np.lib.stride_tricks.sliding_window_view(mat, 11, axis=1)
+            for pattern in _FINDER_PATTERNS:
+                lost_point += 40 * int((windows == pattern).all(axis=-1).sum())
+        return lost_point
+
+    def _lost_point_fused_row(mat):
+        # Horizontal runs and finder patterns, 2x2 blocks and the dark count
+        n = mat.shape[0]
+        top_left = mat[:-1, :-1]
+        blocks = (top_left == mat[:-1, 1:]) & (top_left == mat[1:, :-1]) & (top_left == mat[1:, 1:])
+        rating = int(abs(int(mat.sum()) * 100.0 / (n * n) - 50) / 5)
+        return _line_penalty(mat) + 3 * int(blocks.sum()) + rating * 10
+
+    def _lost_point_fused_col(mat):
+        # Vertical runs and finder patterns
+        return _line_penalty(mat.T)
+
+def _lost_point_kernel(mat) -> int:
+    """Mask penalty score (rules 1-4) of a module matrix"""
+    return _lost_point_fused_row(mat) + _lost_point_fused_col(mat)
+
+class _BitBuffer:
+    """Append-only bit stream held in a single int, most significant bit first"""
+
+    __slots__ = ("bits", "length")
+
+    def __init__(self):
+        self.bits = 0
+        self.length = 0
+
+    def __len__(self):
+        return self.length
+
+    def put(self, num: int, length: int):
+        self.bits = (self.bits << length) | (num & ((1 << length) - 1))
+        self.length += length
+
+    def put_bit(self, bit: bool):
+        self.put(1 if bit else 0, 1)
+
+def _write_segments(data_list, mode_sizes) -> _BitBuffer:
+    """Encode data segments (mode, length, payload) into a bit buffer"""
+    buffer = _BitBuffer()
+    for data in data_list:
+        buffer.put(data.mode, 4)
+        buffer.put(len(data), mode_sizes[data.mode])
+        data.write(buffer)
+    return buffer
+
+def encode_data(data: str, error_correction: int):
+    """Encode data into the smallest fitting version; returns (version, codewords)"""
+    data_list = list(qr_util.optimal_data_chunks(data, minimum=20))
+
+    # The length fields grow at versions 10 and 27, so retry if the first
+    # guess lands in a larger size class
+    start = 1
+    while True:
+        mode_sizes = qr_util.mode_sizes_for_version(start)
+        buffer = _write_segments(data_list, mode_sizes)
+        version = bisect_left(qr_util.BIT_LIMIT_TABLE[error_correction], len(buffer), start)
+        if version == 41:
+            raise qr_exceptions.DataOverflowError()
+        if qr_util.mode_sizes_for_version(version) is mode_sizes:
+            break
+        start = version
+
+    rs_blocks = _rs_blocks(version, error_correction)
+    bit_limit = sum(block.data_count * 8 for block in rs_blocks)
+
+    # Terminator (up to four 0s), then 0s up to a byte boundary
+    buffer.put(0, min(bit_limit - len(buffer), 4))
+    buffer.put(0, -len(buffer) % 8)
+
+    # Alternating pad bytes until the data capacity is filled
+    pad_count = (bit_limit - len(buffer)) // 8
+    pad = (b"\xec\x11" * ((pad_count + 1) // 2))[:pad_count]
+    buffer.put(int.from_bytes(pad, "big"), pad_count * 8)
+
+    data_bytes = buffer.bits.to_bytes(len(buffer) // 8, "big")
+    return version, _add_error_correction(data_bytes, rs_blocks)
+
+@lru_cache(maxsize=None)
+def _rs_blocks(version: int, error_correction: int) -> tuple:
+    """Reed-Solomon block layout for a version/EC level, built once"""
+    return tuple(qr_base.rs_blocks(version, error_correction))
+
+@lru_cache(maxsize=None)
+def _rs_generator(ec_count: int):
+    """Generator polynomial for ec_count EC codewords, built once"""
+    if ec_count in LUT.rsPoly_LUT:
+        return qr_base.Polynomial(LUT.rsPoly_LUT[ec_count], 0)
+    rs_poly = qr_base.Polynomial([1], 0)
+    for i in range(ec_count):
+        rs_poly = rs_poly * qr_base.Polynomial([1, qr_base.gexp(i)], 0)
+    return rs_poly
+
+def _add_error_correction(data_bytes: bytes, rs_blocks) -> list:
+    """Split data into Reed-Solomon blocks, add EC codewords and interleave"""
+    offset = 0
+    dcdata = []
+    ecdata = []
+    for rs_block in rs_blocks:
+        dc_count = rs_block.data_count
+        ec_count = rs_block.total_count - dc_count
+
+        current_dc = list(data_bytes[offset:offset + dc_count])
+        offset += dc_count
+
+        rs_poly = _rs_generator(ec_count)
+        mod_poly = qr_base.Polynomial(current_dc, len(rs_poly) - 1) % rs_poly
+        mod_offset = len(mod_poly) - ec_count
+        current_ec = [mod_poly[i + mod_offset] if i + mod_offset >= 0 else 0
+                      for i in range(ec_count)]
+
+        dcdata.append(current_dc)
+        ecdata.append(current_ec)
+
+    codewords = []
+    for blocks in (dcdata, ecdata):
+        for i in range(max(len(block) for block in blocks)):
+            codewords.extend(block[i] for block in blocks if i < len(block))
+    return codewords
+
+@lru_cache(maxsize=None)
+def _version_layout(version: int):
+    """Function patterns, reserved-area map and data placement order for a version"""
+    n = version * 4 + 17
+    template = np.zeros((n, n), dtype=np.uint8)
+    reserved = np.zeros((n, n), dtype=bool)
+
+    # Finder patterns with their separators
+    for row, col in ((0, 0), (n - 7, 0), (0, n - 7)):
+        for r in range(-1, 8):
+            for c in range(-1, 8):
+                if 0 <= row + r < n and 0 <= col + c < n:
+                    reserved[row + r, col + c] = True
+                    template[row + r, col + c] = (
+                        (0 <= r <= 6 and c in (0, 6))
+                        or (0 <= c <= 6 and r in (0, 6))
+                        or (2 <= r <= 4 and 2 <= c <= 4)
+                    )
+
+    # Alignment patterns, skipping those that overlap the finders
+    positions = qr_util.pattern_position(version)
+    for row in positions:
+        for col in positions:
+            if reserved[row, col]:
+                continue
+            for r in range(-2, 3):
+                for c in range(-2, 3):
+                    reserved[row + r, col + c] = True
+                    template[row + r, col + c] = r in (-2, 2) or c in (-2, 2) or (r == 0 and c == 0)
+
+    # Timing patterns
+    for i in range(8, n - 8):
+        if not reserved[i, 6]:
+            reserved[i, 6] = True
+            template[i, 6] = i % 2 == 0
+        if not reserved[6, i]:
+            reserved[6, i] = True
+            template[6, i] = i % 2 == 0
+
+    # Format information, the dark module and version information are
+    # reserved but left light; they are written once the mask is chosen
+    format_rows, format_cols = _format_positions(n)
+    reserved[format_rows, format_cols] = True
+    reserved[n - 8, 8] = True
+    if version >= 7:
+        version_rows, version_cols = _version_positions(n)
+        reserved[version_rows, version_cols] = True
+        reserved[version_cols, version_rows] = True
+
+    # Zig-zag placement order of the data modules, two columns at a time
+    # from the bottom-right corner, skipping the vertical timing pattern
+    order = []
+    row, inc = n - 1, -1
+    for col in range(n - 1, 0, -2):
+        if col <= 6:
+            col -= 1
+        while True:
+            for c in (col, col - 1):
+                if not reserved[row, c]:
+                    order.append((row, c))
+            row += inc
+            if row < 0 or row >= n:
+                row -= inc
+                inc = -inc
+                break
+    data_rows, data_cols = (np.array(axis, dtype=np.intp) for axis in zip(*order))
+
+    # The eight mask patterns, restricted to the data area
+    i, j = np.indices((n, n))
+    masks = np.array([
+        (i + j) % 2 == 0,
+        i % 2 == 0,
+        j % 3 == 0,
+        (i + j) % 3 == 0,
+        (i // 2 + j // 3) % 2 == 0,
+        (i * j) % 2 + (i * j) % 3 == 0,
+        ((i * j) % 2 + (i * j) % 3) % 2 == 0,
+        ((i * j) % 3 + (i + j) % 2) % 2 == 0
+    ]) & ~reserved
+
+    return template, data_rows, data_cols, masks.astype(np.uint8)
+
+def _format_positions(n: int):
+    """Coordinates of the 15 format bits, vertical copy then horizontal copy"""
+    rows = [i if i < 6 else i + 1 if i < 8 else n - 15 + i for i in range(15)]
+    cols = [8] * 15
+    rows += [8] * 15
+    cols += [n - i - 1 if i < 8 else 15 - i if i < 9 else 14 - i for i in range(15)]
+    return np.array(rows, dtype=np.intp), np.array(cols, dtype=np.intp)
+
+def _version_positions(n: int):
+    """Coordinates of the 18 version bits in the top-right block"""
+    rows = np.arange(18, dtype=np.intp) // 3
+    cols = np.arange(18, dtype=np.intp) % 3 + n - 11
+    return rows, cols
+
+def build_matrix(codewords, version: int, error_correction: int, mask_pattern: int = None) -> np.ndarray:
+    """Lay out the final codewords as a QR module matrix (1 = dark)
+
+    Without a mask_pattern, all eight masks are scored and the lowest-penalty
+    one is used, matching qrcode.QRCode's choice.
+    """
+    template, data_rows, data_cols, masks = _version_layout(version)
+    n = template.shape[0]
+
+    bits = np.unpackbits(np.asarray(codewords, dtype=np.uint8))
+    base = template.copy()
+    base[data_rows[:bits.size], data_cols[:bits.size]] = bits
+
+    if mask_pattern is None:
+        scores = [_lost_point_kernel(base ^ mask) for mask in masks]
+        mask_pattern = int(np.argmin(scores))
+
+    mat = base ^ masks[mask_pattern]
+
+    format_bits = qr_util.BCH_type_info((error_correction << 3) | mask_pattern)
+    format_values = np.array([(format_bits >> i) & 1 for i in range(15)], dtype=np.uint8)
+    format_rows, format_cols = _format_positions(n)
+    mat[format_rows, format_cols] = np.concatenate((format_values, format_values))
+    mat[n - 8, 8] = 1
+
+    if version >= 7:
+        version_bits = qr_util.BCH_type_number(version)
+        version_values = np.array([(version_bits >> i) & 1 for i in range(18)], dtype=np.uint8)
+        version_rows, version_cols = _version_positions(n)
+        mat[version_rows, version_cols] = version_values
+        mat[version_cols, version_rows] = version_values
+
+    return mat
@@ -4,71 +4,276 @@ Handles multi-format document parsing, summarization, and Q&A
 """
 
 import os
+import io
 import asyncio
+import multiprocessing
 import base64
+import hashlib
+import pickle
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from typing import Dict, List, Any, Optional
 from pathlib import Path
-import tempfile
-
-# Document processing libraries
-import PyPDF2
-from docx import Document
-import pandas as pd
-from pptx import Presentation
-from PIL import Image
-import io
 
-# Local AI processing
-from transformers import pipeline, AutoTokenizer, AutoModelForQuestionAnswering
-import torch
+# Document processing and local AI libraries (PyMuPDF/pypdf, python-docx, pandas,
+# python-pptx, PIL, transformers, torch) are imported at their call sites so
+# that plugin discovery doesn't pay their import cost up front.
 
 from . import PluginBase
+from ._batching import MicroBatcher
+
+# Default number of parsed documents kept in memory; older ones are spilled
+# to disk
+MAX_CACHED_DOCUMENTS = 128
+
+# Spilled documents kept on disk, and how long (seconds) they are kept
+MAX_SPILLED_DOCUMENTS = 512
+SPILL_MAX_AGE = 7 * 24 * 3600
+
+# Document IDs are 16-byte BLAKE2b digests in hex
+_DOCUMENT_ID_MATCH = re.compile(r"[0-9a-f]{32}")
+
+# Formats whose parsers are CPU-heavy enough to run in a worker process;
+# the rest are parsed in a thread
+PROCESS_PARSE_FORMATS = {'.pdf', '.docx', '.pptx', '.xlsx'}
+MAX_PARSE_WORKERS = 4
+
+# Formats whose parser only returns metadata, not text worth summarizing
+METADATA_ONLY_FORMATS = {'.png', '.jpg', '.jpeg'}
+
+# Contexts shorter than this are returned as-is instead of running a model
+MIN_ANALYSIS_LENGTH = 50
+
+# Uploads larger than this many bytes are hashed in a worker thread
+HASH_OFFLOAD_THRESHOLD = 1024 * 1024
+
+# Maximum number of rows read from CSV/Excel files
+MAX_TABULAR_ROWS = 5000
+
+# Concurrent summarize/qa requests are coalesced into batches of up to
+# INFERENCE_BATCH_SIZE inputs collected within INFERENCE_BATCH_WINDOW seconds
+INFERENCE_BATCH_SIZE = 16
+INFERENCE_BATCH_WINDOW = 0.01
+
+# Q&A runs over overlapping token windows of the whole document
+QA_WINDOW_LENGTH = 384
+QA_WINDOW_STRIDE = 128
+QA_MAX_QUESTION_LENGTH = 64
+QA_MAX_ANSWER_LENGTH = 30
+
+def _parse_pdf(file_bytes: bytes) -> str:
+    """Parse PDF file"""
+    try:
+        # Prefer PyMuPDF's C backend, then pypdf, then the legacy PyPDF2
+        try:
+            import fitz
+
+            with fitz.open(stream=file_bytes, filetype="pdf") as doc:
+                return "\n".join(page.get_text() for page in doc)
+        except ImportError:
+            pass
+
+        try:
+            import pypdf as pdf_lib
+        except ImportError:
+            import PyPDF2 as pdf_lib
+
+        pdf_reader = pdf_lib.PdfReader(io.BytesIO(file_bytes))
+        return "\n".join(page.extract_text() or "" for page in pdf_reader.pages)
+    except Exception as e:
+        print(f"PDF parsing error: {e}")
+        return ""
+
+def _parse_docx(file_bytes: bytes) -> str:
+    """Parse DOCX file"""
+    try:
+        from docx import Document
+
+        doc = Document(io.BytesIO(file_bytes))
+        return "\n".join(paragraph.text for paragraph in doc.paragraphs)
+    except Exception as e:
+        print(f"DOCX parsing error: {e}")
+        return ""
+
+def _parse_txt(file_bytes: bytes) -> str:
+    """Parse text files (TXT, MD, RTF)"""
+    try:
+        return file_bytes.decode('utf-8')
+    except UnicodeDecodeError:
+        try:
+            return file_bytes.decode('latin-1')
+        except Exception as e:
+            print(f"Text file parsing error: {e}")
+            return ""
+
+def _parse_csv(file_bytes: bytes) -> str:
+    """Parse CSV file"""
+    try:
+        import pandas as pd
+
+        df = pd.read_csv(io.BytesIO(file_bytes), nrows=MAX_TABULAR_ROWS, dtype=str)
+        return df.to_csv(index=False)
+    except Exception as e:
+        print(f"CSV parsing error: {e}")
+        return ""
+
+def _parse_excel(file_bytes: bytes) -> str:
+    """Parse Excel file"""
+    try:
+        import pandas as pd
+
+        df = pd.read_excel(io.BytesIO(file_bytes), nrows=MAX_TABULAR_ROWS, dtype=str)
+        return df.to_csv(index=False)
+    except Exception as e:
+        print(f"Excel parsing error: {e}")
+        return ""
+
+def _parse_pptx(file_bytes: bytes) -> str:
+    """Parse PowerPoint file"""
+    try:
+        from pptx import Presentation
+
+        prs = Presentation(io.BytesIO(file_bytes))
+        return "\n".join(
+            shape.text
+            for slide in prs.slides
+            for shape in slide.shapes
+            if hasattr(shape, "text")
+        )
+    except Exception as e:
+        print(f"PowerPoint parsing error: {e}")
+        return ""
+
+def _parse_image(file_bytes: bytes) -> str:
+    """Parse image file (OCR would be added here)"""
+    try:
+        from PIL import Image
+
+        # For now, return basic image info
+        with Image.open(io.BytesIO(file_bytes)) as img:
+            return f"Image: {img.format} {img.size} {img.mode}"
+    except Exception as e:
+        print(f"Image parsing error: {e}")
+        return ""
 
 class DocumentAnalysisPlugin(PluginBase):
     """Plugin for document analysis and processing"""
     
-    def __init__(self):
+    def __init__(self, max_documents: int = MAX_CACHED_DOCUMENTS):
         self.name = "document_analysis"
         self.supported_formats = {
-            '.pdf': self._parse_pdf,
-            '.docx': self._parse_docx,
-            '.txt': self._parse_txt,
-            '.md': self._parse_txt,
-            '.rtf': self._parse_txt,
-            '.csv': self._parse_csv,
-            '.xlsx': self._parse_excel,
-            '.pptx': self._parse_pptx,
-            '.png': self._parse_image,
-            '.jpg': self._parse_image,
-            '.jpeg': self._parse_image
+            '.pdf': _parse_pdf,
+            '.docx': _parse_docx,
+            '.txt': _parse_txt,
+            '.md': _parse_txt,
+            '.rtf': _parse_txt,
+            '.csv': _parse_csv,
+            '.xlsx': _parse_excel,
+            '.pptx': _parse_pptx,
+            '.png': _parse_image,
+            '.jpg': _parse_image,
+            '.jpeg': _parse_image
         }
         
-        # Initialize local AI models
+        # Heavy formats are parsed in worker processes, started on first use
+        self._parse_pool = None
+        
+        self._dispatch = {
+            "analyze_document": self._analyze_document,
+            "list_documents": self._list_documents,
+            "delete_document": self._delete_document
+        }
+        self._analysis_handlers = {
+            "extract": self._extract_analysis,
+            "summarize": self._summarize_analysis,
+            "qa": self._qa_analysis
+        }
+        
+        # Local AI models are loaded on the first summarize/qa request
         self.summarizer = None
         self.qa_model = None
         self.tokenizer = None
-        self._initialize_models()
+        # Fast tokenizers can't be used from two threads at once
+        self._tokenizer_lock = threading.Lock()
+        self._models_initialized = False
+        self._models_lock = asyncio.Lock()
+        self._summary_batcher = MicroBatcher(self._summarize_batch, INFERENCE_BATCH_SIZE, INFERENCE_BATCH_WINDOW)
+        self._qa_batcher = MicroBatcher(self._answer_batch, INFERENCE_BATCH_SIZE, INFERENCE_BATCH_WINDOW)
         
-        # Document storage
-        self.documents = {}
+        # Document storage, keyed by content hash in least-recently-used order
+        self.documents = OrderedDict()
+        self.max_documents = max_documents
+        self.document_cache_dir = Path("document_cache")
+        self.document_cache_dir.mkdir(exist_ok=True)
+        self._prune_spilled_documents()
+    
+    def _get_parse_pool(self) -> ProcessPoolExecutor:
+        """Create the parser process pool on first use"""
+        if self._parse_pool is None:
+            # Never fork the multi-threaded server: the forkserver starts
+            # from a fresh interpreter that preloads only this module, and
+            # spawn (Windows) re-imports app.py without the assistant
+            if "forkserver" in multiprocessing.get_all_start_methods():
+                context = multiprocessing.get_context("forkserver")
+                context.set_forkserver_preload([__name__])
+            else:
+                context = multiprocessing.get_context("spawn")
+            self._parse_pool = ProcessPoolExecutor(
+                max_workers=min(MAX_PARSE_WORKERS, os.cpu_count() or 1),
+                mp_context=context
+            )
+        return self._parse_pool
+    
+    def close(self):
+        """Shut down the parser worker processes"""
+        if self._parse_pool is not None:
+            self._parse_pool.shutdown(wait=False, cancel_futures=True)
+            self._parse_pool = None
+    
+    async def _ensure_models(self):
+        """Load the local AI models once, on first use"""
+        async with self._models_lock:
+            if not self._models_initialized:
+                await asyncio.to_thread(self._initialize_models)
+                self._models_initialized = True
     
     def _initialize_models(self):
         """Initialize local AI models for summarization and Q&A"""
         try:
-            # Use smaller models for local processing
+            from transformers import pipeline, AutoTokenizer, AutoModelForQuestionAnswering
+            import torch
+            
+            use_cuda = torch.cuda.is_available()
+            
+            # Use smaller models for local processing, in fp16 on GPU
             self.summarizer = pipeline(
                 "summarization",
                 model="facebook/bart-large-cnn",
-                device=0 if torch.cuda.is_available() else -1
+                device=0 if use_cuda else -1,
+                torch_dtype=torch.float16 if use_cuda else torch.float32
             )
             
             model_name = "deepset/roberta-base-squad2"
             self.tokenizer = AutoTokenizer.from_pretrained(model_name)
             self.qa_model = AutoModelForQuestionAnswering.from_pretrained(model_name)
             
-            if torch.cuda.is_available():
-                self.qa_model = self.qa_model.cuda()
-                
+            if use_cuda:
+                self.qa_model = self.qa_model.half().cuda()
+            else:
+                # int8 dynamic quantization of the Linear layers for CPU inference
+                self.qa_model = torch.quantization.quantize_dynamic(
+                    self.qa_model, {torch.nn.Linear}, dtype=torch.qint8
+                )
+                self.summarizer.model = torch.quantization.quantize_dynamic(
+                    self.summarizer.model, {torch.nn.Linear}, dtype=torch.qint8
+                )
+            
+            self.qa_model.eval()
+            
             print("Document analysis models loaded successfully")
         except Exception as e:
             print(f"Warning: Could not load AI models: {e}")
@@ -118,14 +323,10 @@ class DocumentAnalysisPlugin(PluginBase):
         ]
     
     async def execute_function(self, function_name: str, **kwargs) -> Dict[str, Any]:
-        if function_name == "analyze_document":
-            return await self._analyze_document(**kwargs)
-        elif function_name == "list_documents":
-            return await self._list_documents(**kwargs)
-        elif function_name == "delete_document":
-            return await self._delete_document(**kwargs)
-        else:
+        handler = self._dispatch.get(function_name)
+        if handler is None:
             return {"error": f"Unknown function: {function_name}"}
+        return await handler(**kwargs)
     
     def get_widget_info(self) -> Optional[Dict[str, Any]]:
         return {
@@ -146,23 +347,44 @@ class DocumentAnalysisPlugin(PluginBase):
             if file_ext not in self.supported_formats:
                 return {"error": f"Unsupported file format: {file_ext}"}
             
-            # Parse document content
-            content = await self._parse_document(file_bytes, file_ext)
-            
-            if not content:
-                return {"error": "Failed to extract content from document"}
+            # Generate document ID from the extension and raw bytes so repeat
+            # uploads of the same file can reuse the already-parsed content
+            if len(file_bytes) > HASH_OFFLOAD_THRESHOLD:
+                # hashlib releases the GIL, so large uploads hash off the event loop
+                doc_id = await asyncio.to_thread(self._document_id, file_ext, file_bytes)
+            else:
+                doc_id = self._document_id(file_ext, file_bytes)
             
-            # Generate document ID
-            import hashlib
-            doc_id = hashlib.md5(file_bytes).hexdigest()
+            if doc_id in self.documents:
+                self.documents.move_to_end(doc_id)
+            else:
+                # Documents evicted from memory earlier are restored from disk
+                document = await asyncio.to_thread(self._restore_document, doc_id)
+                if document is None:
+                    # Parse document content, loading the AI models alongside
+                    # when the requested analysis needs them
+                    parse = self._parse_document(file_bytes, file_ext)
+                    needs_models = analysis_type == "summarize" or (analysis_type == "qa" and question)
+                    if needs_models and file_ext not in METADATA_ONLY_FORMATS:
+                        content, _ = await asyncio.gather(parse, self._ensure_models())
+                    else:
+                        content = await parse
+                    
+                    if not content:
+                        return {"error": "Failed to extract content from document"}
+                    
+                    document = {
+                        "filename": filename,
+                        "content": content,
+                        "file_size": len(file_bytes),
+                        "upload_time": time.time(),
+                        "has_text": file_ext not in METADATA_ONLY_FORMATS,
+                        "analyses": {}
+                    }
+                
+                await self._store_document(doc_id, document)
             
-            # Store document
-            self.documents[doc_id] = {
-                "filename": filename,
-                "content": content,
-                "file_size": len(file_bytes),
-                "upload_time": asyncio.get_event_loop().time()
-            }
+            content = self.documents[doc_id]["content"]
             
             # Perform analysis
             result = {
@@ -172,209 +394,349 @@ class DocumentAnalysisPlugin(PluginBase):
                 "analysis_type": analysis_type
             }
             
-            if analysis_type == "extract":
-                result["extracted_content"] = content[:2000] + "..." if len(content) > 2000 else content
-                
-            elif analysis_type == "summarize":
-                if self.summarizer:
-                    summary = await self._summarize_text(content)
-                    result["summary"] = summary
-                else:
-                    result["summary"] = "Summarization not available (AI models not loaded)"
-                    
-            elif analysis_type == "qa" and question:
-                if self.qa_model and self.tokenizer:
-                    answer = await self._answer_question(content, question)
-                    result["question"] = question
-                    result["answer"] = answer
-                else:
-                    result["answer"] = "Q&A not available (AI models not loaded)"
+            # Reuse a previous summary/answer for the same document
+            analyses = self.documents[doc_id]["analyses"]
+            analysis_key = (analysis_type, question)
+            if analysis_key in analyses:
+                result.update(analyses[analysis_key])
+                return result
+            
+            handler = self._analysis_handlers.get(analysis_type)
+            if handler:
+                analysis, cacheable = await handler(doc_id, content, question)
+                result.update(analysis)
+                if cacheable:
+                    analyses[analysis_key] = analysis
             
             return result
             
         except Exception as e:
             return {"error": f"Document analysis failed: {str(e)}"}
     
-    async def _parse_document(self, file_bytes: bytes, file_ext: str) -> str:
-        """Parse document based on file extension"""
+    async def _store_document(self, doc_id: str, document: Dict[str, Any]):
+        """Store a document, spilling the least recently used ones to disk when full"""
+        self.documents[doc_id] = document
+        while len(self.documents) > self.max_documents:
+            evicted_id, evicted = self.documents.popitem(last=False)
+            await asyncio.to_thread(self._spill_document, evicted_id, evicted)
+    
+    def _spill_path(self, doc_id: str) -> Path:
+        return self.document_cache_dir / f"{doc_id}.pkl"
+    
+    @staticmethod
+    def _document_info(doc_id: str, document: Dict[str, Any]) -> Dict[str, Any]:
+        """Listing metadata of a stored document"""
+        return {
+            "id": doc_id,
+            "filename": document["filename"],
+            "file_size": document["file_size"],
+            "upload_time": document["upload_time"]
+        }
+    
+    def _spill_document(self, doc_id: str, document: Dict[str, Any]):
+        """Write an evicted document to the on-disk cache, preceded by its
+        listing metadata so listing needn't load the whole document"""
         try:
-            # Create temporary file
-            with tempfile.NamedTemporaryFile(suffix=file_ext, delete=False) as temp_file:
-                temp_file.write(file_bytes)
-                temp_file_path = temp_file.name
-            
-            # Parse using appropriate method
-            parser_func = self.supported_formats.get(file_ext)
-            if parser_func:
-                content = await asyncio.to_thread(parser_func, temp_file_path)
-            else:
-                content = "Unsupported file format"
-            
-            # Clean up temporary file
-            os.unlink(temp_file_path)
-            
-            return content
-            
+            with open(self._spill_path(doc_id), 'wb') as file:
+                pickle.dump(self._document_info(doc_id, document), file, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump(document, file, protocol=pickle.HIGHEST_PROTOCOL)
         except Exception as e:
-            print(f"Error parsing document: {e}")
-            return ""
+            print(f"Error spilling document {doc_id}: {e}")
+        self._prune_spilled_documents()
     
-    def _parse_pdf(self, file_path: str) -> str:
-        """Parse PDF file"""
+    def _restore_document(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        """Load a previously evicted document from the on-disk cache; it is
+        removed there since it is back in memory"""
+        spill_path = self._spill_path(doc_id)
         try:
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                text = ""
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
-                return text
+            with open(spill_path, 'rb') as file:
+                pickle.load(file)
+                document = pickle.load(file)
+        except FileNotFoundError:
+            return None
         except Exception as e:
-            print(f"PDF parsing error: {e}")
-            return ""
+            print(f"Error restoring document {doc_id}: {e}")
+            return None
+        spill_path.unlink(missing_ok=True)
+        return document
+    
+    def _spilled_files(self) -> List[tuple]:
+        """(mtime, path) of the spilled document files, oldest first"""
+        files = []
+        with os.scandir(self.document_cache_dir) as it:
+            for entry in it:
+                if not entry.name.endswith(".pkl"):
+                    continue
+                try:
+                    files.append((entry.stat().st_mtime, Path(entry.path)))
+                except FileNotFoundError:
+                    continue
+        files.sort()
+        return files
     
-    def _parse_docx(self, file_path: str) -> str:
-        """Parse DOCX file"""
+    def _prune_spilled_documents(self):
+        """Remove spilled documents past SPILL_MAX_AGE, then the oldest ones
+        beyond MAX_SPILLED_DOCUMENTS"""
         try:
-            doc = Document(file_path)
-            text = ""
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
-            return text
+            files = self._spilled_files()
+            cutoff = time.time() - SPILL_MAX_AGE
+            expired = sum(1 for mtime, _ in files if mtime < cutoff)
+            removed = max(expired, len(files) - MAX_SPILLED_DOCUMENTS)
+            for _, path in files[:removed]:
+                path.unlink(missing_ok=True)
         except Exception as e:
-            print(f"DOCX parsing error: {e}")
-            return ""
+            print(f"Error pruning document cache: {e}")
     
-    def _parse_txt(self, file_path: str) -> str:
-        """Parse text files (TXT, MD, RTF)"""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                return file.read()
-        except UnicodeDecodeError:
+    def _list_spilled_documents(self) -> List[Dict[str, Any]]:
+        """Listing metadata of the documents spilled to disk"""
+        docs = []
+        for _, path in self._spilled_files():
             try:
-                with open(file_path, 'r', encoding='latin-1') as file:
-                    return file.read()
+                with open(path, 'rb') as file:
+                    docs.append(self._document_info(path.stem, pickle.load(file)))
+            except FileNotFoundError:
+                continue
             except Exception as e:
-                print(f"Text file parsing error: {e}")
-                return ""
+                print(f"Error reading spilled document {path.name}: {e}")
+        return docs
     
-    def _parse_csv(self, file_path: str) -> str:
-        """Parse CSV file"""
-        try:
-            df = pd.read_csv(file_path)
-            return df.to_string()
-        except Exception as e:
-            print(f"CSV parsing error: {e}")
-            return ""
+    @staticmethod
+    def _document_id(file_ext: str, file_bytes: bytes) -> str:
+        """Hash of the extension and content, used as the document ID; the
+        extension picks the parser, so it is part of the identity"""
+        digest = hashlib.blake2b(file_ext.encode() + b"\0", digest_size=16)
+        digest.update(file_bytes)
+        return digest.hexdigest()
     
-    def _parse_excel(self, file_path: str) -> str:
-        """Parse Excel file"""
-        try:
-            df = pd.read_excel(file_path)
-            return df.to_string()
-        except Exception as e:
-            print(f"Excel parsing error: {e}")
-            return ""
+    async def _extract_analysis(self, doc_id: str, content: str, question: str) -> tuple:
+        """Return the beginning of the extracted content"""
+        extracted = content[:2000] + "..." if len(content) > 2000 else content
+        return {"extracted_content": extracted}, False
     
-    def _parse_pptx(self, file_path: str) -> str:
-        """Parse PowerPoint file"""
-        try:
-            prs = Presentation(file_path)
-            text = ""
-            for slide in prs.slides:
-                for shape in slide.shapes:
-                    if hasattr(shape, "text"):
-                        text += shape.text + "\n"
-            return text
-        except Exception as e:
-            print(f"PowerPoint parsing error: {e}")
-            return ""
+    async def _summarize_analysis(self, doc_id: str, content: str, question: str) -> tuple:
+        """Summarize the document; only successful summaries are cacheable"""
+        if not self.documents[doc_id].get("has_text", True):
+            return {"summary": "No text content to summarize"}, True
+        
+        await self._ensure_models()
+        if not self.summarizer:
+            return {"summary": "Summarization not available (AI models not loaded)"}, False
+        
+        summary = await self._summarize_text(content)
+        return {"summary": summary}, summary != "Summarization failed"
     
-    def _parse_image(self, file_path: str) -> str:
-        """Parse image file (OCR would be added here)"""
+    async def _qa_analysis(self, doc_id: str, content: str, question: str) -> tuple:
+        """Answer a question about the document; only successful answers are cacheable"""
+        if not question:
+            return {}, False
+        
+        if not self.documents[doc_id].get("has_text", True):
+            return {"question": question, "answer": "No text content to analyze"}, True
+        
+        await self._ensure_models()
+        if not (self.qa_model and self.tokenizer):
+            return {"answer": "Q&A not available (AI models not loaded)"}, False
+        
+        answer = await self._answer_question(content, question, doc_id)
+        return {"question": question, "answer": answer}, answer != "Q&A failed"
+    
+    async def _parse_document(self, file_bytes: bytes, file_ext: str) -> str:
+        """Parse document based on file extension"""
         try:
-            # For now, return basic image info
-            with Image.open(file_path) as img:
-                return f"Image: {img.format} {img.size} {img.mode}"
+            # Parse using appropriate method; only the heavy formats go to
+            # the process pool, everything else runs in a thread
+            parser_func = self.supported_formats.get(file_ext)
+            if file_ext in PROCESS_PARSE_FORMATS:
+                content = await self._parse_in_pool(parser_func, file_bytes)
+            elif parser_func:
+                content = await asyncio.to_thread(parser_func, file_bytes)
+            else:
+                content = "Unsupported file format"
+            
+            return content
+            
         except Exception as e:
-            print(f"Image parsing error: {e}")
+            print(f"Error parsing document: {e}")
             return ""
     
+    async def _parse_in_pool(self, parser_func, file_bytes: bytes) -> str:
+        """Run a parser in the process pool, replacing the pool and retrying
+        once if a worker died (e.g. OOM-killed or crashed on a bad file)"""
+        loop = asyncio.get_running_loop()
+        for attempt in range(2):
+            pool = self._get_parse_pool()
+            try:
+                return await loop.run_in_executor(pool, parser_func, file_bytes)
+            except BrokenProcessPool:
+                print("Document parser worker died, restarting the parser pool")
+                # Concurrent parses may have replaced the broken pool already
+                if self._parse_pool is pool:
+                    self.close()
+                if attempt:
+                    raise
+    
     async def _summarize_text(self, text: str) -> str:
         """Summarize text using local AI model"""
+        if not text or len(text.strip()) < MIN_ANALYSIS_LENGTH:
+            return text or "No content to analyze"
+        
         try:
-            # Truncate text if too long
-            max_length = 1024
-            if len(text) > max_length:
-                text = text[:max_length]
-            
-            summary = await asyncio.to_thread(
-                self.summarizer,
-                text,
-                max_length=150,
-                min_length=50,
-                do_sample=False
-            )
+            # The summarizer truncates at the model's token limit
+            summary = await self._summary_batcher.submit(text)
             
-            return summary[0]['summary_text']
+            return summary['summary_text']
         except Exception as e:
             print(f"Summarization error: {e}")
             return "Summarization failed"
     
-    async def _answer_question(self, context: str, question: str) -> str:
+    def _summarize_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """Summarize a batch of texts in a single pipeline call"""
+        import torch
+        
+        with torch.inference_mode():
+            return self.summarizer(
+                texts,
+                batch_size=len(texts),
+                max_length=150,
+                min_length=50,
+                do_sample=False,
+                truncation=True
+            )
+    
+    async def _answer_question(self, context: str, question: str, doc_id: str = None) -> str:
         """Answer question using local AI model"""
+        if not context or len(context.strip()) < MIN_ANALYSIS_LENGTH:
+            return context or "No content to analyze"
+        
         try:
-            # Truncate context if too long
-            max_length = 512
-            if len(context) > max_length:
-                context = context[:max_length]
+            # Tokenize the document once into overlapping windows and reuse
+            # them for every question asked about it
+            document = self.documents.get(doc_id)
+            windows = document.get("qa_windows") if document else None
+            if windows is None:
+                windows = await asyncio.to_thread(self._tokenize_context, context)
+                if document:
+                    document["qa_windows"] = windows
+            
+            answer = await self._qa_batcher.submit((question, windows))
+            
+            return answer if answer else "No answer found"
             
-            inputs = await asyncio.to_thread(
-                self.tokenizer,
-                question,
+        except Exception as e:
+            print(f"Q&A error: {e}")
+            return "Q&A failed"
+    
+    def _tokenize_context(self, context: str) -> List[Any]:
+        """Split context into overlapping token windows for Q&A, stored as
+        compact integer arrays since they stay cached (and spilled) with the
+        document"""
+        import numpy as np
+        
+        with self._tokenizer_lock:
+            encoding = self.tokenizer(
                 context,
-                return_tensors="pt",
-                max_length=512,
-                truncation=True
+                add_special_tokens=False,
+                max_length=QA_WINDOW_LENGTH,
+                stride=QA_WINDOW_STRIDE,
+                truncation=True,
+                return_overflowing_tokens=True
             )
+            dtype = np.uint16 if len(self.tokenizer) <= 1 << 16 else np.int32
+        return [np.asarray(window, dtype=dtype) for window in encoding["input_ids"]]
+    
+    def _answer_batch(self, requests: List[tuple]) -> List[str]:
+        """Answer a batch of (question, context windows) requests, picking the
+        highest-scoring span across each request's windows"""
+        import numpy as np
+        import torch
+        
+        # One (question, window) sequence per window of every request
+        sequences = []
+        spans = []
+        with self._tokenizer_lock:
+            for i, (question, windows) in enumerate(requests):
+                question_ids = self.tokenizer(question, add_special_tokens=False)["input_ids"]
+                question_ids = question_ids[:QA_MAX_QUESTION_LENGTH]
+                for window in windows:
+                    if len(window) == 0:
+                        continue
+                    window = np.asarray(window).tolist()
+                    
+                    # Locate the context tokens before the trailing special tokens
+                    sequence = self.tokenizer.build_inputs_with_special_tokens(question_ids, window)
+                    special_mask = self.tokenizer.get_special_tokens_mask(
+                        sequence, already_has_special_tokens=True
+                    )
+                    context_end = len(special_mask)
+                    while special_mask[context_end - 1]:
+                        context_end -= 1
+                    
+                    sequences.append(sequence)
+                    spans.append((i, context_end - len(window), context_end))
+        
+        best = [(float("-inf"), None)] * len(requests)
+        for offset in range(0, len(sequences), INFERENCE_BATCH_SIZE):
+            batch = sequences[offset:offset + INFERENCE_BATCH_SIZE]
             
-            if torch.cuda.is_available():
-                inputs = {k: v.cuda() for k, v in inputs.items()}
-            
-            with torch.no_grad():
-                outputs = self.qa_model(**inputs)
+            input_ids = torch.full(
+                (len(batch), max(len(ids) for ids in batch)),
+                self.tokenizer.pad_token_id,
+                dtype=torch.long
+            )
+            attention_mask = torch.zeros_like(input_ids)
+            for row, ids in enumerate(batch):
+                input_ids[row, :len(ids)] = torch.tensor(ids)
+                attention_mask[row, :len(ids)] = 1
             
-            answer_start = torch.argmax(outputs.start_logits)
-            answer_end = torch.argmax(outputs.end_logits) + 1
+            if torch.cuda.is_available():
+                input_ids = input_ids.cuda()
+                attention_mask = attention_mask.cuda()
             
-            answer = self.tokenizer.convert_tokens_to_string(
-                self.tokenizer.convert_ids_to_tokens(
-                    inputs["input_ids"][0][answer_start:answer_end]
-                )
-            )
+            with torch.inference_mode():
+                outputs = self.qa_model(input_ids=input_ids, attention_mask=attention_mask)
             
-            return answer if answer else "No answer found"
+            start_logits = outputs.start_logits.cpu()
+            end_logits = outputs.end_logits.cpu()
             
-        except Exception as e:
-            print(f"Q&A error: {e}")
-            return "Q&A failed"
+            for row, ids in enumerate(batch):
+                i, context_start, context_end = spans[offset + row]
+                window_start_logits = start_logits[row, context_start:context_end]
+                window_end_logits = end_logits[row, context_start:context_end]
+                
+                answer_start = int(torch.argmax(window_start_logits))
+                answer_end = answer_start + int(torch.argmax(
+                    window_end_logits[answer_start:answer_start + QA_MAX_ANSWER_LENGTH]
+                )) + 1
+                
+                score = float(window_start_logits[answer_start] + window_end_logits[answer_end - 1])
+                if score > best[i][0]:
+                    best[i] = (score, ids[context_start + answer_start:context_start + answer_end])
+        
+        with self._tokenizer_lock:
+            return [
+                self.tokenizer.decode(answer_ids, skip_special_tokens=True).strip() if answer_ids else ""
+                for _, answer_ids in best
+            ]
     
     async def _list_documents(self) -> Dict[str, Any]:
-        """List all stored documents"""
-        docs = []
-        for doc_id, doc_info in self.documents.items():
-            docs.append({
-                "id": doc_id,
-                "filename": doc_info["filename"],
-                "file_size": doc_info["file_size"],
-                "upload_time": doc_info["upload_time"]
-            })
+        """List all stored documents, in memory and spilled to disk"""
+        docs = [self._document_info(doc_id, doc_info) for doc_id, doc_info in self.documents.items()]
+        
+        spilled = await asyncio.to_thread(self._list_spilled_documents)
+        docs.extend(doc for doc in spilled if doc["id"] not in self.documents)
         
         return {"documents": docs}
     
     async def _delete_document(self, document_id: str) -> Dict[str, Any]:
         """Delete a document from storage"""
-        if document_id in self.documents:
-            del self.documents[document_id]
+        # The ID becomes part of a path, so only accept real document IDs
+        if not isinstance(document_id, str) or not _DOCUMENT_ID_MATCH.fullmatch(document_id):
+            return {"error": "Document not found"}
+        
+        spill_path = self._spill_path(document_id)
+        if document_id in self.documents or spill_path.exists():
+            self.documents.pop(document_id, None)
+            spill_path.unlink(missing_ok=True)
             return {"success": True, "message": "Document deleted"}
         else:
             return {"error": "Document not found"}
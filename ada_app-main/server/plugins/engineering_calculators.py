@@ -7,29 +7,260 @@ import asyncio
 import math
 from typing import Dict, List, Any, Optional
 import numpy as np
-from scipy import constants
+from scipy.constants import pi as _PI
 
 from . import PluginBase
+from ._eng_kernels import beam_analysis_batch, column_buckling_batch
+
+# Constants folded once at import instead of per calculation
+_TWO_PI = 2.0 * _PI
+_INV_TWO_PI = 1.0 / _TWO_PI
+_PI_SQ = _PI * _PI
+
+def _number_or_sweep(description: str) -> Dict[str, Any]:
+    """Parameter schema accepting a single number or a list of design points"""
+    return {
+        "anyOf": [
+            {"type": "number"},
+            {"type": "array", "items": {"type": "number"}}
+        ],
+        "description": description
+    }
+
+def _is_sweep(*values) -> bool:
+    """True if any input is a list/array of design points rather than a scalar"""
+    return any(isinstance(v, (list, tuple, np.ndarray)) for v in values)
+
+def _valid_sweep(*values) -> bool:
+    """True if every broadcast design point is present, finite and non-zero,
+    matching the checks on scalar inputs"""
+    arrays = np.broadcast_arrays(*(np.asarray(v, dtype=np.float64) for v in values))
+    return all(np.all(np.isfinite(a) & (a != 0)) for a in arrays)
+
+def _ohms_law(**kwargs) -> Dict[str, Any]:
+    """Ohm's law: solve for the missing quantity and the power"""
+    voltage = kwargs.get('voltage')
+    current = kwargs.get('current')
+    resistance = kwargs.get('resistance')
+    
+    if voltage and current:
+        resistance = voltage / current
+    elif voltage and resistance:
+        current = voltage / resistance
+    elif current and resistance:
+        voltage = current * resistance
+    else:
+        return {"error": "Need at least two of: voltage, current, resistance"}
+    
+    power = voltage * current
+    return {
+        "voltage": voltage,
+        "current": current,
+        "resistance": resistance,
+        "power": power
+    }
+
+def _power(**kwargs) -> Dict[str, Any]:
+    """Power from any two of voltage, current and resistance"""
+    voltage = kwargs.get('voltage')
+    current = kwargs.get('current')
+    resistance = kwargs.get('resistance')
+    
+    if voltage and current:
+        power = voltage * current
+    elif current and resistance:
+        power = current * current * resistance
+    elif voltage and resistance:
+        power = voltage * voltage / resistance
+    else:
+        return {"error": "Need voltage and current, or current and resistance, or voltage and resistance"}
+    
+    return {"power": power}
+
+def _impedance(**kwargs) -> Dict[str, Any]:
+    """Series RLC impedance at one frequency or over a frequency sweep"""
+    resistance = kwargs.get('resistance', 0)
+    frequency = kwargs.get('frequency', 0)
+    inductance = kwargs.get('inductance', 0)
+    capacitance = kwargs.get('capacitance', 0)
+    
+    if isinstance(frequency, (list, tuple, np.ndarray)):
+        # Frequency sweep: evaluate every point elementwise
+        f = np.asarray(frequency, dtype=np.float64)
+        if f.size == 0 or np.any(f <= 0):
+            return {"error": "Frequencies must be positive for impedance calculation"}
+        
+        inductive_reactance = _TWO_PI * f * inductance if inductance else np.zeros_like(f)
+        with np.errstate(divide='ignore'):
+            capacitive_reactance = (
+                np.where(f * capacitance > 0, _INV_TWO_PI / (f * capacitance), 0.0)
+                if capacitance else np.zeros_like(f)
+            )
+        reactance = inductive_reactance - capacitive_reactance
+        impedance = np.hypot(resistance, reactance)
+        
+        return {
+            "frequency": f.tolist(),
+            "impedance": impedance.tolist(),
+            "resistance": resistance,
+            "reactance": reactance.tolist(),
+            "inductive_reactance": inductive_reactance.tolist(),
+            "capacitive_reactance": capacitive_reactance.tolist()
+        }
+    
+    if frequency == 0:
+        return {"error": "Frequency is required for impedance calculation"}
+    
+    inductive_reactance = _TWO_PI * frequency * inductance if inductance else 0
+    capacitive_reactance = _INV_TWO_PI / (frequency * capacitance) if capacitance else 0
+    reactance = inductive_reactance - capacitive_reactance
+    impedance = math.hypot(resistance, reactance)
+    
+    return {
+        "impedance": impedance,
+        "resistance": resistance,
+        "reactance": reactance,
+        "inductive_reactance": inductive_reactance,
+        "capacitive_reactance": capacitive_reactance
+    }
+
+def _resonance(**kwargs) -> Dict[str, Any]:
+    """LC resonant frequency"""
+    inductance = kwargs.get('inductance')
+    capacitance = kwargs.get('capacitance')
+    
+    if not inductance or not capacitance:
+        return {"error": "Both inductance and capacitance are required"}
+    
+    resonant_frequency = _INV_TWO_PI / math.sqrt(inductance * capacitance)
+    return {"resonant_frequency": resonant_frequency}
+
+_ELEC_OPS = {
+    "ohms_law": _ohms_law,
+    "power": _power,
+    "impedance": _impedance,
+    "resonance": _resonance
+}
+
+def _stress(**kwargs) -> Dict[str, Any]:
+    """Normal stress from force and area"""
+    force = kwargs.get('force')
+    area = kwargs.get('area')
+    
+    if not force or not area:
+        return {"error": "Both force and area are required"}
+    
+    stress = force / area
+    return {"stress": stress}
+
+def _strain(**kwargs) -> Dict[str, Any]:
+    """Engineering strain from a change in length"""
+    original_length = kwargs.get('length')
+    change_in_length = kwargs.get('change_in_length', 0)
+    
+    if not original_length:
+        return {"error": "Original length is required"}
+    
+    strain = change_in_length / original_length
+    return {"strain": strain}
+
+def _dynamics(**kwargs) -> Dict[str, Any]:
+    """Force and kinetic energy of a moving mass"""
+    mass = kwargs.get('mass')
+    acceleration = kwargs.get('acceleration')
+    velocity = kwargs.get('velocity', 0)
+    
+    if not mass:
+        return {"error": "Mass is required"}
+    
+    force = mass * acceleration if acceleration else 0
+    kinetic_energy = 0.5 * mass * velocity * velocity
+    
+    return {
+        "force": force,
+        "kinetic_energy": kinetic_energy
+    }
+
+_MECH_OPS = {
+    "stress": _stress,
+    "strain": _strain,
+    "dynamics": _dynamics
+}
+
+def _beam_analysis(**kwargs) -> Dict[str, Any]:
+    """Cantilever beam deflection and maximum moment"""
+    load = kwargs.get('load')
+    length = kwargs.get('length')
+    modulus = kwargs.get('modulus')
+    moment_of_inertia = kwargs.get('moment_of_inertia')
+    
+    if _is_sweep(load, length, modulus, moment_of_inertia):
+        if any(v is None for v in (load, length, modulus, moment_of_inertia)) or \
+                not _valid_sweep(load, length, modulus, moment_of_inertia):
+            return {"error": "All parameters (load, length, modulus, moment_of_inertia) are required"}
+        deflection, max_moment = beam_analysis_batch(load, length, modulus, moment_of_inertia)
+        return {
+            "deflection": deflection.tolist(),
+            "max_moment": max_moment.tolist()
+        }
+    
+    if not all([load, length, modulus, moment_of_inertia]):
+        return {"error": "All parameters (load, length, modulus, moment_of_inertia) are required"}
+    
+    # Simple cantilever beam deflection
+    deflection = (load * length * length * length) / (3 * modulus * moment_of_inertia)
+    max_moment = load * length
+    
+    return {
+        "deflection": deflection,
+        "max_moment": max_moment
+    }
+
+def _column_buckling(**kwargs) -> Dict[str, Any]:
+    """Euler column buckling load and safety factor"""
+    load = kwargs.get('load')
+    length = kwargs.get('length')
+    modulus = kwargs.get('modulus')
+    moment_of_inertia = kwargs.get('moment_of_inertia')
+    
+    if _is_sweep(load, length, modulus, moment_of_inertia):
+        if any(v is None for v in (load, length, modulus, moment_of_inertia)) or \
+                not _valid_sweep(load, length, modulus, moment_of_inertia):
+            return {"error": "All parameters are required"}
+        buckling_load, safety_factor = column_buckling_batch(load, length, modulus, moment_of_inertia)
+        return {
+            "buckling_load": buckling_load.tolist(),
+            "safety_factor": safety_factor.tolist()
+        }
+    
+    if not all([load, length, modulus, moment_of_inertia]):
+        return {"error": "All parameters are required"}
+    
+    # Euler buckling load
+    buckling_load = (_PI_SQ * modulus * moment_of_inertia) / (length * length)
+    safety_factor = buckling_load / load if load > 0 else float('inf')
+    
+    return {
+        "buckling_load": buckling_load,
+        "safety_factor": safety_factor
+    }
+
+_STRUCT_OPS = {
+    "beam_analysis": _beam_analysis,
+    "column_buckling": _column_buckling
+}
 
 class EngineeringCalculatorsPlugin(PluginBase):
     """Plugin for engineering calculations"""
     
     def __init__(self):
         self.name = "engineering_calculators"
+        # Handlers for each exposed function; calculators are plain functions
+        # since they do no I/O
         self.calculators = {
-            'electrical': self._electrical_calculations,
-            'mechanical': self._mechanical_calculations,
-            'structural': self._structural_calculations,
-            'thermal': self._thermal_calculations,
-            'fluid': self._fluid_calculations,
-            'chemical': self._chemical_calculations,
-            'optical': self._optical_calculations,
-            'acoustic': self._acoustic_calculations,
-            'materials': self._materials_calculations,
-            'control': self._control_calculations,
-            'signal': self._signal_calculations,
-            'antenna': self._antenna_calculations,
-            'power': self._power_calculations
+            'electrical_calculator': self._electrical_calculator,
+            'mechanical_calculator': self._mechanical_calculator,
+            'structural_calculator': self._structural_calculator
         }
     
     def get_name(self) -> str:
@@ -50,7 +281,7 @@ class EngineeringCalculatorsPlugin(PluginBase):
                         "voltage": {"type": "number", "description": "Voltage in volts"},
                         "current": {"type": "number", "description": "Current in amperes"},
                         "resistance": {"type": "number", "description": "Resistance in ohms"},
-                        "frequency": {"type": "number", "description": "Frequency in Hz"},
+                        "frequency": _number_or_sweep("Frequency in Hz (a list of frequencies computes an impedance sweep)"),
                         "inductance": {"type": "number", "description": "Inductance in henries"},
                         "capacitance": {"type": "number", "description": "Capacitance in farads"}
                     },
@@ -81,10 +312,10 @@ class EngineeringCalculatorsPlugin(PluginBase):
                     "type": "object",
                     "properties": {
                         "calculation_type": {"type": "string", "description": "Type: 'beam_analysis', 'column_buckling', 'truss_analysis'"},
-                        "load": {"type": "number", "description": "Load in newtons"},
-                        "length": {"type": "number", "description": "Length in meters"},
-                        "modulus": {"type": "number", "description": "Elastic modulus in Pa"},
-                        "moment_of_inertia": {"type": "number", "description": "Moment of inertia in m⁴"}
+                        "load": _number_or_sweep("Load in newtons (lists of values compute a design sweep)"),
+                        "length": _number_or_sweep("Length in meters"),
+                        "modulus": _number_or_sweep("Elastic modulus in Pa"),
+                        "moment_of_inertia": _number_or_sweep("Moment of inertia in m⁴")
                     },
                     "required": ["calculation_type"]
                 }
@@ -92,14 +323,12 @@ class EngineeringCalculatorsPlugin(PluginBase):
         ]
     
     async def execute_function(self, function_name: str, **kwargs) -> Dict[str, Any]:
-        if function_name == "electrical_calculator":
-            return await self._electrical_calculator(**kwargs)
-        elif function_name == "mechanical_calculator":
-            return await self._mechanical_calculator(**kwargs)
-        elif function_name == "structural_calculator":
-            return await self._structural_calculator(**kwargs)
-        else:
+        calculator = self.calculators.get(function_name)
+        if calculator is None:
             return {"error": f"Unknown function: {function_name}"}
+        
+        result = calculator(**kwargs)
+        return await result if asyncio.iscoroutine(result) else result
     
     def get_widget_info(self) -> Optional[Dict[str, Any]]:
         return {
@@ -108,171 +337,35 @@ class EngineeringCalculatorsPlugin(PluginBase):
             "socket_events": ["engineering_calculation_result"]
         }
     
-    async def _electrical_calculator(self, calculation_type: str, **kwargs) -> Dict[str, Any]:
+    def _electrical_calculator(self, calculation_type: str, **kwargs) -> Dict[str, Any]:
         """Electrical engineering calculations"""
         try:
-            if calculation_type == "ohms_law":
-                voltage = kwargs.get('voltage')
-                current = kwargs.get('current')
-                resistance = kwargs.get('resistance')
-                
-                if voltage and current:
-                    resistance = voltage / current
-                elif voltage and resistance:
-                    current = voltage / resistance
-                elif current and resistance:
-                    voltage = current * resistance
-                else:
-                    return {"error": "Need at least two of: voltage, current, resistance"}
-                
-                power = voltage * current
-                return {
-                    "voltage": voltage,
-                    "current": current,
-                    "resistance": resistance,
-                    "power": power
-                }
-            
-            elif calculation_type == "power":
-                voltage = kwargs.get('voltage')
-                current = kwargs.get('current')
-                resistance = kwargs.get('resistance')
-                
-                if voltage and current:
-                    power = voltage * current
-                elif current and resistance:
-                    power = current**2 * resistance
-                elif voltage and resistance:
-                    power = voltage**2 / resistance
-                else:
-                    return {"error": "Need voltage and current, or current and resistance, or voltage and resistance"}
-                
-                return {"power": power}
-            
-            elif calculation_type == "impedance":
-                resistance = kwargs.get('resistance', 0)
-                frequency = kwargs.get('frequency', 0)
-                inductance = kwargs.get('inductance', 0)
-                capacitance = kwargs.get('capacitance', 0)
-                
-                if frequency == 0:
-                    return {"error": "Frequency is required for impedance calculation"}
-                
-                inductive_reactance = 2 * math.pi * frequency * inductance if inductance else 0
-                capacitive_reactance = 1 / (2 * math.pi * frequency * capacitance) if capacitance else 0
-                reactance = inductive_reactance - capacitive_reactance
-                impedance = math.sqrt(resistance**2 + reactance**2)
-                
-                return {
-                    "impedance": impedance,
-                    "resistance": resistance,
-                    "reactance": reactance,
-                    "inductive_reactance": inductive_reactance,
-                    "capacitive_reactance": capacitive_reactance
-                }
-            
-            elif calculation_type == "resonance":
-                inductance = kwargs.get('inductance')
-                capacitance = kwargs.get('capacitance')
-                
-                if not inductance or not capacitance:
-                    return {"error": "Both inductance and capacitance are required"}
-                
-                resonant_frequency = 1 / (2 * math.pi * math.sqrt(inductance * capacitance))
-                return {"resonant_frequency": resonant_frequency}
-            
-            else:
+            operation = _ELEC_OPS.get(calculation_type)
+            if operation is None:
                 return {"error": f"Unknown electrical calculation type: {calculation_type}"}
-                
+            return operation(**kwargs)
+            
         except Exception as e:
             return {"error": f"Electrical calculation failed: {str(e)}"}
     
-    async def _mechanical_calculator(self, calculation_type: str, **kwargs) -> Dict[str, Any]:
+    def _mechanical_calculator(self, calculation_type: str, **kwargs) -> Dict[str, Any]:
         """Mechanical engineering calculations"""
         try:
-            if calculation_type == "stress":
-                force = kwargs.get('force')
-                area = kwargs.get('area')
-                
-                if not force or not area:
-                    return {"error": "Both force and area are required"}
-                
-                stress = force / area
-                return {"stress": stress}
-            
-            elif calculation_type == "strain":
-                original_length = kwargs.get('length')
-                change_in_length = kwargs.get('change_in_length', 0)
-                
-                if not original_length:
-                    return {"error": "Original length is required"}
-                
-                strain = change_in_length / original_length
-                return {"strain": strain}
-            
-            elif calculation_type == "dynamics":
-                mass = kwargs.get('mass')
-                acceleration = kwargs.get('acceleration')
-                velocity = kwargs.get('velocity', 0)
-                
-                if not mass:
-                    return {"error": "Mass is required"}
-                
-                force = mass * acceleration if acceleration else 0
-                kinetic_energy = 0.5 * mass * velocity**2
-                
-                return {
-                    "force": force,
-                    "kinetic_energy": kinetic_energy
-                }
-            
-            else:
+            operation = _MECH_OPS.get(calculation_type)
+            if operation is None:
                 return {"error": f"Unknown mechanical calculation type: {calculation_type}"}
-                
+            return operation(**kwargs)
+            
         except Exception as e:
             return {"error": f"Mechanical calculation failed: {str(e)}"}
     
-    async def _structural_calculator(self, calculation_type: str, **kwargs) -> Dict[str, Any]:
+    def _structural_calculator(self, calculation_type: str, **kwargs) -> Dict[str, Any]:
         """Structural engineering calculations"""
         try:
-            if calculation_type == "beam_analysis":
-                load = kwargs.get('load')
-                length = kwargs.get('length')
-                modulus = kwargs.get('modulus')
-                moment_of_inertia = kwargs.get('moment_of_inertia')
-                
-                if not all([load, length, modulus, moment_of_inertia]):
-                    return {"error": "All parameters (load, length, modulus, moment_of_inertia) are required"}
-                
-                # Simple cantilever beam deflection
-                deflection = (load * length**3) / (3 * modulus * moment_of_inertia)
-                max_moment = load * length
-                
-                return {
-                    "deflection": deflection,
-                    "max_moment": max_moment
-                }
-            
-            elif calculation_type == "column_buckling":
-                load = kwargs.get('load')
-                length = kwargs.get('length')
-                modulus = kwargs.get('modulus')
-                moment_of_inertia = kwargs.get('moment_of_inertia')
-                
-                if not all([load, length, modulus, moment_of_inertia]):
-                    return {"error": "All parameters are required"}
-                
-                # Euler buckling load
-                buckling_load = (math.pi**2 * modulus * moment_of_inertia) / length**2
-                safety_factor = buckling_load / load if load > 0 else float('inf')
-                
-                return {
-                    "buckling_load": buckling_load,
-                    "safety_factor": safety_factor
-                }
-            
-            else:
+            operation = _STRUCT_OPS.get(calculation_type)
+            if operation is None:
                 return {"error": f"Unknown structural calculation type: {calculation_type}"}
-                
+            return operation(**kwargs)
+            
         except Exception as e:
             return {"error": f"Structural calculation failed: {str(e)}"}
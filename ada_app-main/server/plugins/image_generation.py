@@ -6,6 +6,12 @@ Local Stable Diffusion image generation with GPU support
 import os
 import asyncio
 import base64
+import hashlib
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
 from typing import Dict, List, Any, Optional
 from pathlib import Path
 import tempfile
@@ -13,11 +19,50 @@ from datetime import datetime
 
 # Local AI image generation
 import torch
-from diffusers import StableDiffusionXLPipeline, DPMSolverMultistepScheduler
+from diffusers import StableDiffusionXLPipeline, DPMSolverMultistepScheduler, LCMScheduler, AutoencoderKL
+from diffusers.models.attention_processor import AttnProcessor2_0
 from PIL import Image
 import io
 
+# Optional weight quantization for the UNet
+try:
+    from optimum.quanto import quantize, freeze, qint8, qfloat8
+    QUANTO_AVAILABLE = True
+except ImportError:
+    QUANTO_AVAILABLE = False
+
 from . import PluginBase
+from ._batching import MicroBatcher
+
+LCM_LORA_ID = "latent-consistency/lcm-lora-sdxl"
+
+# SDXL VAE finetuned to decode in fp16 without NaNs (black images)
+FP16_VAE_ID = "madebyollin/sdxl-vae-fp16-fix"
+
+# Number of generated images remembered for repeat requests
+IMAGE_CACHE_SIZE = 32
+
+# Images kept in the on-disk cache, and how long (seconds) they are kept
+MAX_DISK_CACHED_IMAGES = 256
+DISK_CACHE_MAX_AGE = 7 * 24 * 3600
+
+# GPU micro-batching: concurrent requests with the same size, steps and
+# guidance arriving within the window share one pipeline call
+IMAGE_BATCH_WINDOW = 0.05
+MAX_BATCH = 4
+
+# Below this much free VRAM, SDXL submodules are offloaded to the CPU between uses
+MIN_FREE_VRAM_BYTES = 10 * 1024**3
+
+def _write_atomic(path: Path, data: bytes):
+    """Write data to a fresh temporary file and move it into place, so an
+    existing file (possibly hardlinked to a cache entry) is never written through"""
+    temp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        temp_path.write_bytes(data)
+        os.replace(temp_path, path)
+    finally:
+        temp_path.unlink(missing_ok=True)
 
 class ImageGenerationPlugin(PluginBase):
     """Plugin for AI image generation using Stable Diffusion"""
@@ -25,12 +70,89 @@ class ImageGenerationPlugin(PluginBase):
     def __init__(self):
         self.name = "image_generation"
         self.pipeline = None
+        self.use_lcm = False
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
         self.generated_images_dir = Path("generated_images")
         self.generated_images_dir.mkdir(exist_ok=True)
         
-        # Initialize the model
-        self._initialize_model()
+        # Recent results keyed by normalized generation parameters, backed
+        # by an on-disk cache that survives restarts
+        self._img_cache: OrderedDict = OrderedDict()
+        self.image_cache_dir = self.generated_images_dir / "cache"
+        self.image_cache_dir.mkdir(exist_ok=True)
+        self._prune_image_cache()
+        
+        # Metadata of generated images keyed by image ID, persisted to index.json
+        self.index_path = self.generated_images_dir / "index.json"
+        self._index: Dict[str, Dict[str, Any]] = self._load_index()
+        # Snapshots are numbered so a slower writer never overwrites a newer one
+        self._index_lock = threading.Lock()
+        self._index_version = 0
+        self._index_written = 0
+        
+        # The model is loaded on the first generate_image request
+        self._model_initialized = False
+        self._init_lock = asyncio.Lock()
+        
+        # Concurrent CUDA requests with matching shapes share a pipeline call
+        self._render_batcher = MicroBatcher(
+            self._render_batch, MAX_BATCH, IMAGE_BATCH_WINDOW, key=self._batch_key
+        )
+        
+        # One reusable generator per batch slot, created with the pipeline;
+        # the lock keeps pipeline calls (and generator reseeding) serialized
+        self._generators: List[Any] = []
+        self._render_lock = threading.Lock()
+    
+    async def _ensure_model(self):
+        """Load the Stable Diffusion pipeline once, on first use"""
+        async with self._init_lock:
+            if not self._model_initialized:
+                await asyncio.to_thread(self._initialize_model)
+                self._model_initialized = True
+    
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        """Load the image index, building it from the directory on first run"""
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Warning: Could not read image index, rebuilding it: {e}")
+        
+        index = {}
+        with os.scandir(self.generated_images_dir) as it:
+            for entry in it:
+                if entry.name.startswith("generated_") and entry.name.endswith(".png"):
+                    # Images from before the index used their timestamp as ID
+                    image_id = entry.name[len("generated_"):-len(".png")]
+                    stat = entry.stat()
+                    index[image_id] = {
+                        "image_id": image_id,
+                        "filename": entry.name,
+                        "filepath": entry.path,
+                        "size": stat.st_size,
+                        "created_at": datetime.fromtimestamp(stat.st_ctime).isoformat()
+                    }
+        return index
+    
+    async def _save_index(self):
+        """Snapshot the image index on the event loop and write it in a thread"""
+        self._index_version += 1
+        version = self._index_version
+        snapshot = json.dumps(self._index)
+        try:
+            await asyncio.to_thread(self._write_index, snapshot, version)
+        except Exception as e:
+            print(f"Warning: Could not save image index: {e}")
+    
+    def _write_index(self, snapshot: str, version: int):
+        """Atomically write an index snapshot unless a newer one is already on disk"""
+        with self._index_lock:
+            if version > self._index_written:
+                _write_atomic(self.index_path, snapshot.encode('utf-8'))
+                self._index_written = version
     
     def _initialize_model(self):
         """Initialize Stable Diffusion XL pipeline"""
@@ -40,22 +162,83 @@ class ImageGenerationPlugin(PluginBase):
             # Use Stable Diffusion XL Turbo for faster generation
             model_id = "stabilityai/stable-diffusion-xl-base-1.0"
             
+            # On GPU, use the fp16-safe VAE so decoding needn't upcast to fp32
+            extra_components = {}
+            if self.device == "cuda":
+                try:
+                    extra_components["vae"] = AutoencoderKL.from_pretrained(
+                        FP16_VAE_ID, torch_dtype=torch.float16
+                    )
+                except Exception as e:
+                    print(f"Warning: Could not load fp16 VAE, using the default one: {e}")
+            
             self.pipeline = StableDiffusionXLPipeline.from_pretrained(
                 model_id,
                 torch_dtype=torch.float16 if self.device == "cuda" else torch.float32,
                 use_safetensors=True,
-                variant="fp16" if self.device == "cuda" else None
+                variant="fp16" if self.device == "cuda" else None,
+                **extra_components
             )
             
-            # Optimize for speed
-            self.pipeline.scheduler = DPMSolverMultistepScheduler.from_config(
-                self.pipeline.scheduler.config
-            )
+            # Decode batched latents one image at a time, and large images in tiles
+            self.pipeline.vae.enable_slicing()
+            self.pipeline.vae.enable_tiling()
             
+            # Optimize for speed: the LCM-LoRA lets LCMScheduler converge in
+            # 4-8 steps; fall back to DPM-Solver if it can't be loaded
+            try:
+                self.pipeline.load_lora_weights(LCM_LORA_ID)
+                # Fold the LoRA into the base weights so UNet steps don't pay
+                # for extra LoRA matmuls, and quantization/compilation below
+                # see plain Linear layers
+                self.pipeline.fuse_lora()
+                self.pipeline.scheduler = LCMScheduler.from_config(
+                    self.pipeline.scheduler.config
+                )
+                self.use_lcm = True
+            except Exception as e:
+                print(f"Warning: Could not load LCM-LoRA, using DPM-Solver: {e}")
+                try:
+                    self.pipeline.unload_lora_weights()
+                except Exception:
+                    pass
+                self.pipeline.scheduler = DPMSolverMultistepScheduler.from_config(
+                    self.pipeline.scheduler.config
+                )
+                self.use_lcm = False
+            
+            if self.device == "cuda":
+                # Let cuDNN pick the fastest kernels for the fixed image shapes
+                torch.backends.cuda.matmul.allow_tf32 = True
+                torch.backends.cudnn.benchmark = True
+                
+                # Keep the whole pipeline on the GPU only if it fits; otherwise
+                # move each submodule in just while it runs
+                free_memory, _ = torch.cuda.mem_get_info()
+                offload = free_memory < MIN_FREE_VRAM_BYTES
+                if offload:
+                    print(f"Only {free_memory / 1024**3:.1f} GB VRAM free, enabling model CPU offload")
+                    self.pipeline.enable_model_cpu_offload()
+                else:
+                    self.pipeline = self.pipeline.to(self.device)
+                # Use PyTorch SDPA attention, which dispatches to FlashAttention-2
+                # or memory-efficient kernels where the GPU supports them
+                torch.backends.cuda.enable_flash_sdp(True)
+                torch.backends.cuda.enable_mem_efficient_sdp(True)
+                self.pipeline.unet.set_attn_processor(AttnProcessor2_0())
+                
+                self._quantize_unet()
+                # Compiled graphs don't survive the offload hooks moving modules
+                if not offload:
+                    self._compile_pipeline()
+            else:
+                # Reduce peak memory of the FP32 CPU pipeline
+                self.pipeline.enable_attention_slicing("max")
+            
+            self._generators = [torch.Generator(device=self.device) for _ in range(MAX_BATCH)]
             if self.device == "cuda":
-                self.pipeline = self.pipeline.to(self.device)
-                # Enable memory efficient attention
-                self.pipeline.enable_xformers_memory_efficient_attention()
+                # Return load-time scratch allocations once, never per request
+                torch.cuda.empty_cache()
             
             print(f"Stable Diffusion XL loaded successfully on {self.device}")
             
@@ -63,6 +246,47 @@ class ImageGenerationPlugin(PluginBase):
             print(f"Warning: Could not load Stable Diffusion model: {e}")
             self.pipeline = None
     
+    def _quantize_unet(self):
+        """Quantize UNet weights: FP8 on Hopper (SM90+), INT8 otherwise"""
+        if not QUANTO_AVAILABLE:
+            return
+        
+        try:
+            weights = qfloat8 if torch.cuda.get_device_capability()[0] >= 9 else qint8
+            quantize(self.pipeline.unet, weights=weights)
+            freeze(self.pipeline.unet)
+            print(f"Stable Diffusion XL UNet quantized to {weights}")
+        except Exception as e:
+            print(f"Warning: Could not quantize UNet: {e}")
+    
+    def _compile_pipeline(self):
+        """Compile the UNet and VAE decoder with torch.compile and warm them up"""
+        if not hasattr(torch, "compile"):
+            print("torch.compile not available (PyTorch < 2.0), skipping compilation")
+            return
+        
+        # torch.compile is lazy: errors only surface in the warm-up run, so
+        # keep the originals to restore if it fails
+        original_unet = self.pipeline.unet
+        original_decode = self.pipeline.vae.decode
+        try:
+            self.pipeline.unet.to(memory_format=torch.channels_last)
+            self.pipeline.unet = torch.compile(
+                self.pipeline.unet, mode="reduce-overhead", fullgraph=False
+            )
+            self.pipeline.vae.decode = torch.compile(
+                self.pipeline.vae.decode, mode="reduce-overhead", fullgraph=False
+            )
+            
+            # Compile during model loading (on the first generate_image
+            # request) rather than on the first real pipeline call
+            self._run_pipe("warmup", "", 1024, 1024, 4, 1.0)
+            print("Stable Diffusion XL UNet and VAE compiled")
+        except Exception as e:
+            print(f"Warning: Could not compile Stable Diffusion pipeline, using it uncompiled: {e}")
+            self.pipeline.unet = original_unet
+            self.pipeline.vae.decode = original_decode
+    
     def get_name(self) -> str:
         return self.name
     
@@ -81,8 +305,9 @@ class ImageGenerationPlugin(PluginBase):
                         "negative_prompt": {"type": "string", "description": "What to avoid in the image (optional)"},
                         "width": {"type": "integer", "description": "Image width (default: 1024)"},
                         "height": {"type": "integer", "description": "Image height (default: 1024)"},
-                        "num_inference_steps": {"type": "integer", "description": "Number of denoising steps (default: 20)"},
-                        "guidance_scale": {"type": "number", "description": "How closely to follow the prompt (default: 7.5)"}
+                        "num_inference_steps": {"type": "integer", "description": "Number of denoising steps (default: 6)"},
+                        "guidance_scale": {"type": "number", "description": "How closely to follow the prompt (default: 1.0)"},
+                        "seed": {"type": "integer", "description": "Random seed for reproducible images (optional; omit for a new image every time)"}
                     },
                     "required": ["prompt"]
                 }
@@ -128,9 +353,11 @@ class ImageGenerationPlugin(PluginBase):
     
     async def _generate_image(self, prompt: str, negative_prompt: str = "", 
                             width: int = 1024, height: int = 1024,
-                            num_inference_steps: int = 20, guidance_scale: float = 7.5) -> Dict[str, Any]:
+                            num_inference_steps: int = 6, guidance_scale: float = 1.0,
+                            seed: int = None) -> Dict[str, Any]:
         """Generate image using Stable Diffusion"""
         try:
+            await self._ensure_model()
             if not self.pipeline:
                 return {"error": "Image generation model not loaded"}
             
@@ -141,39 +368,81 @@ class ImageGenerationPlugin(PluginBase):
             # Validate parameters
             width = max(512, min(width, 1024))
             height = max(512, min(height, 1024))
-            num_inference_steps = max(10, min(num_inference_steps, 50))
-            guidance_scale = max(1.0, min(guidance_scale, 20.0))
+            if self.use_lcm:
+                num_inference_steps = max(4, min(num_inference_steps, 8))
+                guidance_scale = max(1.0, min(guidance_scale, 2.0))
+            else:
+                num_inference_steps = max(10, min(num_inference_steps, 50))
+                guidance_scale = max(1.0, min(guidance_scale, 20.0))
             
             print(f"Generating image: {prompt}")
             print(f"Negative prompt: {negative_prompt}")
             print(f"Size: {width}x{height}, Steps: {num_inference_steps}, Guidance: {guidance_scale}")
             
-            # Generate image
-            image = await asyncio.to_thread(
-                self.pipeline,
-                prompt=prompt,
-                negative_prompt=negative_prompt,
-                width=width,
-                height=height,
-                num_inference_steps=num_inference_steps,
-                guidance_scale=guidance_scale
-            ).images[0]
-            
-            # Save image
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"generated_{timestamp}.png"
+            
+            # Generate a unique image ID; prompt and timestamp alone collide
+            # for concurrent requests with different seeds
+            image_id = uuid.uuid4().hex
+            
+            filename = f"generated_{timestamp}_{image_id}.png"
             filepath = self.generated_images_dir / filename
             
-            image.save(filepath, "PNG")
+            # Unseeded requests draw a random seed and must produce a fresh
+            # image, so only seeded requests use the caches
+            cache_key = cache_path = image_bytes = None
+            if seed is not None:
+                cache_key = (prompt.strip().lower(), negative_prompt, width, height,
+                             num_inference_steps, round(guidance_scale, 2), seed)
+                cache_path = self.image_cache_dir / f"{self._cache_hash(cache_key)}.png"
+                
+                # Look in memory first, then in the on-disk cache
+                image_bytes = self._img_cache.get(cache_key)
+                if image_bytes is not None:
+                    self._img_cache.move_to_end(cache_key)
+                else:
+                    image_bytes = await asyncio.to_thread(self._read_cached_image, cache_path)
+                    if image_bytes is not None:
+                        self._remember_image(cache_key, image_bytes)
             
-            # Convert to base64 for frontend
-            buffer = io.BytesIO()
-            image.save(buffer, format="PNG")
-            image_base64 = base64.b64encode(buffer.getvalue()).decode()
+            if image_bytes is not None:
+                # Reuse the earlier result under the new filename
+                image_base64 = await asyncio.to_thread(
+                    self._store_png, image_bytes, filepath, cache_path, True
+                )
+            else:
+                request = {
+                    "prompt": prompt,
+                    "negative_prompt": negative_prompt,
+                    "width": width,
+                    "height": height,
+                    "num_inference_steps": num_inference_steps,
+                    "guidance_scale": guidance_scale,
+                    "seed": seed,
+                    "filepath": filepath,
+                    "cache_path": cache_path
+                }
+                if self.device == "cuda":
+                    image_bytes, image_base64 = await self._render_batcher.submit(request)
+                else:
+                    # Generate, encode and save the image in one worker-thread trip
+                    results = await asyncio.to_thread(self._render_batch, [request])
+                    image_bytes, image_base64 = results[0]
+                if cache_key is not None:
+                    self._remember_image(cache_key, image_bytes)
             
-            # Generate image ID
-            import hashlib
-            image_id = hashlib.md5(f"{prompt}_{timestamp}".encode()).hexdigest()
+            # Record the image in the index
+            self._index[image_id] = {
+                "image_id": image_id,
+                "filename": filename,
+                "filepath": str(filepath),
+                "prompt": prompt,
+                "size": len(image_bytes),
+                "created_at": datetime.now().isoformat()
+            }
+            if cache_path is not None:
+                self._index[image_id]["cache_file"] = cache_path.name
+            await self._save_index()
             
             result = {
                 "image_id": image_id,
@@ -185,6 +454,7 @@ class ImageGenerationPlugin(PluginBase):
                 "height": height,
                 "num_inference_steps": num_inference_steps,
                 "guidance_scale": guidance_scale,
+                "seed": seed,
                 "image_base64": image_base64,
                 "generated_at": timestamp
             }
@@ -195,21 +465,137 @@ class ImageGenerationPlugin(PluginBase):
             print(f"Image generation error: {e}")
             return {"error": f"Image generation failed: {str(e)}"}
     
+    @staticmethod
+    def _cache_hash(cache_key: tuple) -> str:
+        """Stable filename-safe hash of the generation parameters"""
+        return hashlib.blake2b(repr(cache_key).encode(), digest_size=16).hexdigest()
+    
+    @staticmethod
+    def _read_cached_image(cache_path: Path) -> Optional[bytes]:
+        """Read an on-disk cache entry and mark it recently used; None on a miss"""
+        try:
+            image_bytes = cache_path.read_bytes()
+            os.utime(cache_path)
+            return image_bytes
+        except FileNotFoundError:
+            return None
+    
+    def _prune_image_cache(self):
+        """Remove disk cache entries past DISK_CACHE_MAX_AGE, then the least
+        recently used ones beyond MAX_DISK_CACHED_IMAGES"""
+        try:
+            files = []
+            with os.scandir(self.image_cache_dir) as it:
+                for entry in it:
+                    if not entry.name.endswith(".png"):
+                        continue
+                    try:
+                        files.append((entry.stat().st_mtime, Path(entry.path)))
+                    except FileNotFoundError:
+                        continue
+            files.sort()
+            
+            cutoff = time.time() - DISK_CACHE_MAX_AGE
+            expired = sum(1 for mtime, _ in files if mtime < cutoff)
+            removed = max(expired, len(files) - MAX_DISK_CACHED_IMAGES)
+            for _, path in files[:removed]:
+                path.unlink(missing_ok=True)
+        except Exception as e:
+            print(f"Warning: Could not prune image cache: {e}")
+    
+    def _remember_image(self, cache_key: tuple, image_bytes: bytes):
+        """Add PNG bytes to the in-memory cache, evicting the oldest entry"""
+        self._img_cache[cache_key] = image_bytes
+        if len(self._img_cache) > IMAGE_CACHE_SIZE:
+            self._img_cache.popitem(last=False)
+    
+    @staticmethod
+    def _link_or_write(source: Path, target: Path, data: bytes):
+        """Hardlink target to source, writing the bytes instead if linking fails"""
+        try:
+            target.unlink(missing_ok=True)
+            os.link(source, target)
+        except OSError:
+            _write_atomic(target, data)
+    
+    @staticmethod
+    def _batch_key(request: Dict[str, Any]) -> tuple:
+        """Parameters that must match for requests to share a pipeline call"""
+        return (request["width"], request["height"],
+                request["num_inference_steps"], request["guidance_scale"])
+    
+    def _render_batch(self, requests: List[Dict[str, Any]]) -> List[tuple]:
+        """Generate images for requests sharing one batch key in a single
+        pipeline call, save them as PNG and return (png_bytes, base64) pairs"""
+        first = requests[0]
+        
+        with self._render_lock, torch.inference_mode():
+            # Reseed one persistent generator per image: the requested seed,
+            # or a random one for unseeded requests
+            generators = self._generators[:len(requests)]
+            for generator, request in zip(generators, requests):
+                seed = request["seed"]
+                generator.manual_seed(seed if seed is not None else int.from_bytes(os.urandom(8), 'little'))
+            
+            images = self.pipeline(
+                prompt=[request["prompt"] for request in requests],
+                negative_prompt=[request["negative_prompt"] for request in requests],
+                width=first["width"],
+                height=first["height"],
+                num_inference_steps=first["num_inference_steps"],
+                guidance_scale=first["guidance_scale"],
+                generator=generators
+            ).images
+        
+        results = []
+        for image, request in zip(images, requests):
+            # Encode the PNG once (fast zlib level) and reuse the bytes for
+            # the file and the base64 payload
+            buffer = io.BytesIO()
+            image.save(buffer, format="PNG", compress_level=1)
+            image_bytes = buffer.getvalue()
+            image_base64 = self._store_png(
+                image_bytes, request["filepath"], request["cache_path"], False
+            )
+            results.append((image_bytes, image_base64))
+        return results
+    
+    def _store_png(self, image_bytes: bytes, filepath: Path, cache_path: Optional[Path],
+                   from_cache: bool) -> str:
+        """Save PNG bytes under filepath, keep the cache file (if any) in sync
+        and return the base64 payload for the frontend"""
+        if from_cache:
+            self._link_or_write(cache_path, filepath, image_bytes)
+        else:
+            _write_atomic(filepath, image_bytes)
+            if cache_path is not None:
+                self._link_or_write(filepath, cache_path, image_bytes)
+                self._prune_image_cache()
+        return base64.b64encode(image_bytes).decode()
+    
+    def _run_pipe(self, prompt: str, negative_prompt: str, width: int, height: int,
+                  num_inference_steps: int, guidance_scale: float, seed: int = None) -> Image.Image:
+        """Run the diffusion pipeline and return the first generated image"""
+        generator = None
+        if seed is not None:
+            generator = torch.Generator(device=self.device).manual_seed(seed)
+        
+        with torch.inference_mode():
+            return self.pipeline(
+                prompt=prompt,
+                negative_prompt=negative_prompt,
+                width=width,
+                height=height,
+                num_inference_steps=num_inference_steps,
+                guidance_scale=guidance_scale,
+                generator=generator
+            ).images[0]
+    
     async def _list_generated_images(self) -> Dict[str, Any]:
         """List all generated images"""
         try:
-            images = []
-            for filepath in self.generated_images_dir.glob("generated_*.png"):
-                stat = filepath.stat()
-                images.append({
-                    "filename": filepath.name,
-                    "filepath": str(filepath),
-                    "size": stat.st_size,
-                    "created_at": datetime.fromtimestamp(stat.st_ctime).isoformat()
-                })
-            
             # Sort by creation time (newest first)
-            images.sort(key=lambda x: x["created_at"], reverse=True)
+            images = sorted(self._index.values(), key=lambda x: x["created_at"], reverse=True)
             
             return {"images": images}
             
@@ -219,16 +605,21 @@ class ImageGenerationPlugin(PluginBase):
     async def _delete_generated_image(self, image_id: str) -> Dict[str, Any]:
         """Delete a generated image"""
         try:
-            # For now, we'll delete by filename pattern
-            # In a real implementation, you'd store image metadata with IDs
-            filename = f"generated_{image_id}.png"
-            filepath = self.generated_images_dir / filename
-            
-            if filepath.exists():
-                filepath.unlink()
-                return {"success": True, "message": "Image deleted"}
-            else:
+            image_info = self._index.pop(image_id, None)
+            if image_info is None:
                 return {"error": "Image not found"}
+            
+            (self.generated_images_dir / image_info["filename"]).unlink(missing_ok=True)
+            
+            # Drop the cache entry too, so the image's bytes don't outlive it
+            cache_file = image_info.get("cache_file")
+            if cache_file:
+                (self.image_cache_dir / cache_file).unlink(missing_ok=True)
+                for cache_key in [key for key in self._img_cache if f"{self._cache_hash(key)}.png" == cache_file]:
+                    del self._img_cache[cache_key]
+            
+            await self._save_index()
+            return {"success": True, "message": "Image deleted"}
                 
         except Exception as e:
             return {"error": f"Failed to delete image: {str(e)}"}
@@ -3,8 +3,12 @@ QR Code Generator Plugin
 Generate custom styled QR codes with multiple types and bulk generation
 """
 
+import os
 import asyncio
 import base64
+import functools
+import re
+import time
 from typing import Dict, List, Any, Optional
 from pathlib import Path
 import tempfile
@@ -12,10 +16,37 @@ from datetime import datetime
 
 # QR Code generation libraries
 import qrcode
-from PIL import Image, ImageDraw
+import numpy as np
+from PIL import Image, ImageColor, ImageDraw
 import io
 
 from . import PluginBase
+from ._qr_fast import NUMBA_AVAILABLE, build_matrix, encode_data
+
+# Fixed mask used when the best-mask search is skipped; any of the 8 masks
+# yields a valid code, the search only picks the most scan-friendly one
+DEFAULT_MASK_PATTERN = 0
+
+# Hex color codes like '#FF0000'
+_HEX_COLOR_MATCH = re.compile(r'#[0-9A-Fa-f]{6}').fullmatch
+
+# Backslash escapes for special characters in WiFi (MECARD-style) fields
+# and vCard 3.0 text values
+_WIFI_ESCAPES = str.maketrans({"\\": "\\\\", ";": "\\;", ",": "\\,", '"': '\\"', ":": "\\:"})
+_VCARD_ESCAPES = str.maketrans({"\\": "\\\\", ";": "\\;", ",": "\\,", "\n": "\\n"})
+
+# Number of built QR codes (PNG and base64) kept for repeated requests
+QR_CACHE_SIZE = 512
+
+# Number of decoded, resized logos kept for reuse across QR codes
+LOGO_CACHE_SIZE = 32
+
+@functools.lru_cache(maxsize=LOGO_CACHE_SIZE)
+def _load_logo(logo_path: str, logo_mtime: int, logo_size: int) -> Image.Image:
+    """Load a logo as RGBA and resize it; callers must not modify the result.
+    logo_mtime is only part of the cache key, so a replaced file is reloaded"""
+    with Image.open(logo_path) as logo:
+        return logo.convert("RGBA").resize((logo_size, logo_size), Image.Resampling.LANCZOS)
 
 class QRCodeGeneratorPlugin(PluginBase):
     """Plugin for QR code generation with custom styling"""
@@ -34,6 +65,10 @@ class QRCodeGeneratorPlugin(PluginBase):
             'wifi': {'error_correction': qrcode.constants.ERROR_CORRECT_M},
             'vcard': {'error_correction': qrcode.constants.ERROR_CORRECT_M}
         }
+        
+        # Compile the matrix kernels now rather than on the first request
+        if NUMBA_AVAILABLE:
+            build_matrix([0] * 26, 1, qrcode.constants.ERROR_CORRECT_M)
     
     def get_name(self) -> str:
         return self.name
@@ -55,7 +90,8 @@ class QRCodeGeneratorPlugin(PluginBase):
                         "foreground_color": {"type": "string", "description": "Foreground color (hex code, default: '#000000')"},
                         "background_color": {"type": "string", "description": "Background color (hex code, default: '#FFFFFF')"},
                         "logo_path": {"type": "string", "description": "Path to logo image to embed (optional)"},
-                        "border": {"type": "integer", "description": "Border width in pixels (default: 4)"}
+                        "border": {"type": "integer", "description": "Border width in pixels (default: 4)"},
+                        "skip_mask_optimization": {"type": "boolean", "description": "Use a fixed mask instead of searching for the most scannable one; faster (default: false)"}
                     },
                     "required": ["data", "qr_type"]
                 }
@@ -70,7 +106,8 @@ class QRCodeGeneratorPlugin(PluginBase):
                         "qr_type": {"type": "string", "description": "Type of QR code for all items"},
                         "size": {"type": "integer", "description": "QR code size in pixels (default: 400)"},
                         "foreground_color": {"type": "string", "description": "Foreground color (hex code)"},
-                        "background_color": {"type": "string", "description": "Background color (hex code)"}
+                        "background_color": {"type": "string", "description": "Background color (hex code)"},
+                        "return_base64": {"type": "boolean", "description": "Include each image as base64 in the response; otherwise only file paths are returned (default: false)"}
                     },
                     "required": ["data_list", "qr_type"]
                 }
@@ -142,7 +179,8 @@ class QRCodeGeneratorPlugin(PluginBase):
     
     async def _generate_qr_code(self, data: str, qr_type: str, size: int = 400,
                               foreground_color: str = "#000000", background_color: str = "#FFFFFF",
-                              logo_path: str = None, border: int = 4) -> Dict[str, Any]:
+                              logo_path: str = None, border: int = 4,
+                              skip_mask_optimization: bool = False) -> Dict[str, Any]:
         """Generate a single QR code with custom styling"""
         try:
             if qr_type not in self.qr_types:
@@ -152,76 +190,148 @@ class QRCodeGeneratorPlugin(PluginBase):
             if not self._is_valid_hex_color(foreground_color) or not self._is_valid_hex_color(background_color):
                 return {"error": "Invalid color format. Use hex codes (e.g., '#FF0000')"}
             
-            # Create QR code
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=self.qr_types[qr_type]['error_correction'],
-                box_size=10,
-                border=border
+            build = functools.partial(
+                self._build_qr_png, data, self.qr_types[qr_type]['error_correction'],
+                size, foreground_color, background_color, border
             )
             
-            qr.add_data(data)
-            qr.make(fit=True)
-            
-            # Create QR code image
-            qr_image = qr.make_image(fill_color=foreground_color, back_color=background_color)
-            
-            # Resize to requested size
-            qr_image = qr_image.resize((size, size), Image.Resampling.NEAREST)
-            
-            # Add logo if provided
+            # Logo failures surface here, outside the memoized builder, so a
+            # missing or broken logo never gets a logo-less code cached for it
             if logo_path:
-                qr_image = await self._add_logo_to_qr(qr_image, logo_path)
-            
-            # Save and convert to base64
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"qr_{qr_type}_{timestamp}.png"
-            filepath = self.qr_codes_dir / filename
-            
-            qr_image.save(filepath, "PNG")
-            
-            # Convert to base64
-            buffer = io.BytesIO()
-            qr_image.save(buffer, format="PNG")
-            qr_base64 = base64.b64encode(buffer.getvalue()).decode()
-            
-            return {
-                "filename": filename,
-                "filepath": str(filepath),
-                "qr_type": qr_type,
-                "data": data,
-                "size": size,
-                "foreground_color": foreground_color,
-                "background_color": background_color,
-                "qr_base64": qr_base64,
-                "generated_at": timestamp
-            }
+                try:
+                    logo_mtime = os.stat(logo_path).st_mtime_ns
+                    png_bytes, qr_base64 = await asyncio.to_thread(
+                        build, logo_path, skip_mask_optimization, logo_mtime=logo_mtime
+                    )
+                except OSError as e:
+                    print(f"Error adding logo to QR code: {e}")
+                    logo_path = None
+            if not logo_path:
+                png_bytes, qr_base64 = await asyncio.to_thread(build, None, skip_mask_optimization)
+            
+            # A nanosecond-clock file ID keeps names unique across calls
+            return await self._save_qr_code(png_bytes, qr_base64, data, qr_type, size,
+                                            foreground_color, background_color,
+                                            f"{time.time_ns():x}",
+                                            datetime.now().strftime("%Y%m%d_%H%M%S"))
             
         except Exception as e:
             print(f"QR code generation error: {e}")
             return {"error": f"QR code generation failed: {str(e)}"}
     
+    @staticmethod
+    @functools.lru_cache(maxsize=QR_CACHE_SIZE)
+    def _build_qr_png(data: str, error_correction: int, size: int, foreground_color: str,
+                      background_color: str, border: int, logo_path: str = None,
+                      skip_mask_optimization: bool = False, return_base64: bool = True,
+                      logo_mtime: Optional[int] = None) -> tuple:
+        """Build a styled QR code and return (png_bytes, base64 or None); results
+        are memoized since the output depends only on the arguments"""
+        # Encode the codewords, then lay out and mask-score the module matrix
+        version, codewords = encode_data(data, error_correction)
+        
+        # A fixed mask skips the 8-pattern penalty search
+        matrix = build_matrix(
+            codewords, version, error_correction,
+            DEFAULT_MASK_PATTERN if skip_mask_optimization else None
+        )
+        
+        # Create a 2-color palette image with one pixel per module plus the
+        # border; it is resized and PNG-encoded as 1 bit per pixel
+        modules = np.pad(matrix, border)
+        qr_image = Image.frombytes("P", modules.shape[::-1], modules.tobytes())
+        qr_image.putpalette(ImageColor.getrgb(background_color) + ImageColor.getrgb(foreground_color))
+        
+        # Resize to requested size
+        qr_image = qr_image.resize((size, size), Image.Resampling.NEAREST)
+        
+        # Add logo if provided; the logo needs full color
+        if logo_path:
+            qr_image = QRCodeGeneratorPlugin._add_logo_to_qr(qr_image.convert("RGB"), logo_path, logo_mtime)
+        
+        # Encode once; the fastest zlib level costs little size on flat QR
+        # images, and the palette optimization pass is skipped
+        buffer = io.BytesIO()
+        qr_image.save(buffer, format="PNG", optimize=False, compress_level=1)
+        png_bytes = buffer.getvalue()
+        return png_bytes, base64.b64encode(png_bytes).decode() if return_base64 else None
+    
+    async def _save_qr_code(self, png_bytes: bytes, qr_base64: Optional[str], data: str, qr_type: str,
+                            size: int, foreground_color: str, background_color: str,
+                            file_id: str, generated_at: str) -> Dict[str, Any]:
+        """Save a built QR code and return its metadata, with the base64 image if given"""
+        filename = f"qr_{qr_type}_{file_id}.png"
+        filepath = self.qr_codes_dir / filename
+        
+        # Write off the event loop so other QR codes keep building meanwhile
+        await asyncio.to_thread(filepath.write_bytes, png_bytes)
+        
+        result = {
+            "filename": filename,
+            "filepath": str(filepath),
+            "qr_type": qr_type,
+            "data": data,
+            "size": size,
+            "foreground_color": foreground_color,
+            "background_color": background_color,
+            "generated_at": generated_at
+        }
+        if qr_base64 is not None:
+            result["qr_base64"] = qr_base64
+        return result
+    
     async def _generate_bulk_qr_codes(self, data_list: List[str], qr_type: str, size: int = 400,
-                                    foreground_color: str = "#000000", background_color: str = "#FFFFFF") -> Dict[str, Any]:
+                                    foreground_color: str = "#000000", background_color: str = "#FFFFFF",
+                                    return_base64: bool = False) -> Dict[str, Any]:
         """Generate multiple QR codes in batch"""
         try:
             if qr_type not in self.qr_types:
                 return {"error": f"Unsupported QR type: {qr_type}"}
             
-            results = []
+            if not self._is_valid_hex_color(foreground_color) or not self._is_valid_hex_color(background_color):
+                return {"error": "Invalid color format. Use hex codes (e.g., '#FF0000')"}
+            
+            error_correction = self.qr_types[qr_type]['error_correction']
             
-            for i, data in enumerate(data_list):
-                result = await self._generate_qr_code(
-                    data=data,
-                    qr_type=qr_type,
-                    size=size,
-                    foreground_color=foreground_color,
-                    background_color=background_color
-                )
+            # Build all codes concurrently in worker threads, at most one per core
+            semaphore = asyncio.Semaphore(os.cpu_count() or 4)
+            
+            async def build(data: str):
+                async with semaphore:
+                    return await asyncio.to_thread(
+                        self._build_qr_png, data, error_correction, size,
+                        foreground_color, background_color, 4, None, True, return_base64
+                    )
+            
+            built = await asyncio.gather(*(build(data) for data in data_list), return_exceptions=True)
+            
+            # One timestamp and batch ID for the whole run; items are numbered
+            generated_at = datetime.now().strftime("%Y%m%d_%H%M%S")
+            batch_id = f"{time.time_ns():x}"
+            
+            indices, saves = [], []
+            for i, (data, item) in enumerate(zip(data_list, built)):
+                if isinstance(item, Exception):
+                    print(f"QR code generation error: {item}")
+                    continue
+                
+                png_bytes, qr_base64 = item
+                indices.append(i)
+                saves.append(self._save_qr_code(png_bytes, qr_base64, data, qr_type, size,
+                                                foreground_color, background_color,
+                                                f"{batch_id}_{i}", generated_at))
+            
+            # Issue all file writes together once the batch is built
+            saved = await asyncio.gather(*saves, return_exceptions=True)
+            
+            results = []
+            for i, result in zip(indices, saved):
+                if isinstance(result, Exception):
+                    print(f"QR code save error: {result}")
+                    continue
                 
-                if "error" not in result:
-                    result["index"] = i
-                    results.append(result)
+                result["index"] = i
+                results.append(result)
             
             return {
                 "bulk_results": results,
@@ -238,13 +348,15 @@ class QRCodeGeneratorPlugin(PluginBase):
                               hidden: bool = False, size: int = 400) -> Dict[str, Any]:
         """Generate QR code for WiFi network connection"""
         try:
-            # Format WiFi data according to standard
-            wifi_data = f"WIFI:T:{encryption};S:{ssid};P:{password};H:{str(hidden).lower()};;"
+            # Format WiFi data according to standard, escaping special characters
+            wifi_data = (f"WIFI:T:{encryption};S:{ssid.translate(_WIFI_ESCAPES)};"
+                         f"P:{password.translate(_WIFI_ESCAPES)};H:{str(hidden).lower()};;")
             
             return await self._generate_qr_code(
                 data=wifi_data,
                 qr_type="wifi",
-                size=size
+                size=size,
+                skip_mask_optimization=True
             )
             
         except Exception as e:
@@ -255,38 +367,32 @@ class QRCodeGeneratorPlugin(PluginBase):
                                title: str = "", website: str = "", address: str = "", size: int = 400) -> Dict[str, Any]:
         """Generate QR code for contact information (vCard)"""
         try:
-            # Build vCard data
-            vcard_lines = ["BEGIN:VCARD", "VERSION:3.0"]
-            
-            if name:
-                vcard_lines.append(f"FN:{name}")
-                vcard_lines.append(f"N:{name};;;;")
+            # Build vCard data; text values are escaped and lines end in CRLF
+            # as vCard 3.0 requires
+            name = name.translate(_VCARD_ESCAPES)
+            vcard_lines = ["BEGIN:VCARD", "VERSION:3.0", f"FN:{name}", f"N:{name};;;;"]
             
             if phone:
-                vcard_lines.append(f"TEL:{phone}")
-            
+                vcard_lines.append(f"TEL:{phone.translate(_VCARD_ESCAPES)}")
             if email:
-                vcard_lines.append(f"EMAIL:{email}")
-            
+                vcard_lines.append(f"EMAIL:{email.translate(_VCARD_ESCAPES)}")
             if company:
-                vcard_lines.append(f"ORG:{company}")
-            
+                vcard_lines.append(f"ORG:{company.translate(_VCARD_ESCAPES)}")
             if title:
-                vcard_lines.append(f"TITLE:{title}")
-            
+                vcard_lines.append(f"TITLE:{title.translate(_VCARD_ESCAPES)}")
             if website:
                 vcard_lines.append(f"URL:{website}")
-            
             if address:
-                vcard_lines.append(f"ADR:;;{address};;;;")
+                vcard_lines.append(f"ADR:;;{address.translate(_VCARD_ESCAPES)};;;;")
             
             vcard_lines.append("END:VCARD")
-            vcard_data = "\n".join(vcard_lines)
+            vcard_data = "\r\n".join(vcard_lines)
             
             return await self._generate_qr_code(
                 data=vcard_data,
                 qr_type="vcard",
-                size=size
+                size=size,
+                skip_mask_optimization=True
             )
             
         except Exception as e:
@@ -296,58 +402,51 @@ class QRCodeGeneratorPlugin(PluginBase):
     async def _list_generated_qr_codes(self) -> Dict[str, Any]:
         """List all generated QR codes"""
         try:
-            qr_codes = []
-            for filepath in self.qr_codes_dir.glob("qr_*.png"):
-                stat = filepath.stat()
-                qr_codes.append({
-                    "filename": filepath.name,
-                    "filepath": str(filepath),
-                    "size": stat.st_size,
-                    "created_at": datetime.fromtimestamp(stat.st_ctime).isoformat()
-                })
+            # One directory scan; each entry is stat'ed once and reused
+            with os.scandir(self.qr_codes_dir) as it:
+                entries = [(entry, entry.stat()) for entry in it
+                           if entry.name.startswith("qr_") and entry.name.endswith(".png")]
             
             # Sort by creation time (newest first)
-            qr_codes.sort(key=lambda x: x["created_at"], reverse=True)
+            entries.sort(key=lambda item: item[1].st_ctime, reverse=True)
+            
+            qr_codes = [{
+                "filename": entry.name,
+                "filepath": entry.path,
+                "size": stat.st_size,
+                "created_at": datetime.fromtimestamp(stat.st_ctime).isoformat()
+            } for entry, stat in entries]
             
-            return {"qr_codes": qr_codes, "total_count": len(qr_codes)}
+            return {
+                "qr_codes": qr_codes,
+                "total_count": len(qr_codes),
+                "cache_info": self._build_qr_png.cache_info()._asdict()
+            }
             
         except Exception as e:
             return {"error": f"Failed to list QR codes: {str(e)}"}
     
-    def _is_valid_hex_color(self, color: str) -> bool:
+    @staticmethod
+    @functools.lru_cache(maxsize=64)
+    def _is_valid_hex_color(color: str) -> bool:
         """Validate hex color format"""
-        if not color.startswith('#'):
-            return False
-        if len(color) != 7:
-            return False
-        try:
-            int(color[1:], 16)
-            return True
-        except ValueError:
-            return False
+        return _HEX_COLOR_MATCH(color) is not None
     
-    async def _add_logo_to_qr(self, qr_image: Image.Image, logo_path: str) -> Image.Image:
-        """Add logo to center of QR code"""
-        try:
-            # Load logo
-            logo = Image.open(logo_path)
-            
-            # Calculate logo size (should be about 1/4 of QR code size)
-            qr_size = qr_image.size[0]
-            logo_size = qr_size // 4
-            
-            # Resize logo
-            logo = logo.resize((logo_size, logo_size), Image.Resampling.LANCZOS)
-            
-            # Calculate position to center logo
-            pos_x = (qr_size - logo_size) // 2
-            pos_y = (qr_size - logo_size) // 2
-            
-            # Paste logo onto QR code
-            qr_image.paste(logo, (pos_x, pos_y))
-            
-            return qr_image
-            
-        except Exception as e:
-            print(f"Error adding logo to QR code: {e}")
-            return qr_image  # Return original QR code if logo addition fails
+    @staticmethod
+    def _add_logo_to_qr(qr_image: Image.Image, logo_path: str, logo_mtime: Optional[int] = None) -> Image.Image:
+        """Add logo to center of QR code; load errors propagate to the caller"""
+        # Calculate logo size (should be about 1/4 of QR code size)
+        qr_size = qr_image.size[0]
+        logo_size = qr_size // 4
+        
+        # Load and resize logo, reusing it across QR codes
+        logo = _load_logo(logo_path, logo_mtime, logo_size)
+        
+        # Calculate position to center logo
+        pos_x = (qr_size - logo_size) // 2
+        pos_y = (qr_size - logo_size) // 2
+        
+        # Paste logo onto QR code, using its alpha channel as the mask
+        qr_image.paste(logo, (pos_x, pos_y), logo)
+        
+        return qr_image
@@ -4,6 +4,8 @@ Multi-language translation with local processing support
 """
 
 import asyncio
+import threading
+from collections import OrderedDict
 from typing import Dict, List, Any, Optional
 import json
 
@@ -18,12 +20,19 @@ except ImportError:
 
 from . import PluginBase
 
+# Maximum translation requests in flight at once, to stay clear of rate limits
+TRANSLATION_CONCURRENCY = 8
+
+# Number of translations remembered for repeated (text, source, target) requests
+TRANSLATION_CACHE_SIZE = 2048
+
 class TranslationPlugin(PluginBase):
     """Plugin for multi-language translation"""
     
     def __init__(self):
         self.name = "translation"
         self.translator = None
+        self._t_cache: OrderedDict = OrderedDict()
         self.supported_languages = {
             'af': 'Afrikaans', 'sq': 'Albanian', 'am': 'Amharic', 'ar': 'Arabic',
             'hy': 'Armenian', 'az': 'Azerbaijani', 'eu': 'Basque', 'be': 'Belarusian',
@@ -55,6 +64,7 @@ class TranslationPlugin(PluginBase):
             'vi': 'Vietnamese', 'cy': 'Welsh', 'xh': 'Xhosa', 'yi': 'Yiddish',
             'yo': 'Yoruba', 'zu': 'Zulu'
         }
+        self._lang_codes = frozenset(self.supported_languages)
         
         self._initialize_translator()
     
@@ -62,7 +72,9 @@ class TranslationPlugin(PluginBase):
         """Initialize the translation service"""
         if TRANSLATION_AVAILABLE:
             try:
-                self.translator = Translator()
+                # One keep-alive HTTP/2 client is shared by all requests
+                self.translator = Translator(http2=True)
+                threading.Thread(target=self._warm_up_translator, daemon=True).start()
                 print("Translation service initialized successfully")
             except Exception as e:
                 print(f"Warning: Could not initialize translation service: {e}")
@@ -71,6 +83,13 @@ class TranslationPlugin(PluginBase):
             print("Warning: Translation libraries not available")
             self.translator = None
     
+    def _warm_up_translator(self):
+        """Open the translation connection (DNS, TLS, token) ahead of the first request"""
+        try:
+            self.translator.translate("hi", dest="en")
+        except Exception as e:
+            print(f"Warning: Translation service warm-up failed: {e}")
+    
     def get_name(self) -> str:
         return self.name
     
@@ -153,20 +172,15 @@ class TranslationPlugin(PluginBase):
                 return {"error": "Translation service not available"}
             
             # Validate target language
-            if target_language not in self.supported_languages:
+            if target_language not in self._lang_codes:
                 return {"error": f"Unsupported target language: {target_language}"}
             
             # Validate source language if provided
-            if source_language and source_language not in self.supported_languages:
+            if source_language and source_language not in self._lang_codes:
                 return {"error": f"Unsupported source language: {source_language}"}
             
             # Perform translation
-            result = await asyncio.to_thread(
-                self.translator.translate,
-                text,
-                dest=target_language,
-                src=source_language
-            )
+            result = await self._translate_cached(text, target_language, source_language)
             
             return {
                 "original_text": text,
@@ -182,6 +196,26 @@ class TranslationPlugin(PluginBase):
             print(f"Translation error: {e}")
             return {"error": f"Translation failed: {str(e)}"}
     
+    async def _translate_cached(self, text: str, target_language: str, source_language: str = None):
+        """Translate text, reusing the result of an earlier identical request"""
+        key = (text, source_language or "", target_language)
+        result = self._t_cache.get(key)
+        if result is not None:
+            self._t_cache.move_to_end(key)
+            return result
+        
+        result = await asyncio.to_thread(
+            self.translator.translate,
+            text,
+            dest=target_language,
+            src=source_language or "auto"
+        )
+        
+        self._t_cache[key] = result
+        if len(self._t_cache) > TRANSLATION_CACHE_SIZE:
+            self._t_cache.popitem(last=False)
+        return result
+    
     async def _detect_language(self, text: str) -> Dict[str, Any]:
         """Detect the language of given text"""
         try:
@@ -216,40 +250,48 @@ class TranslationPlugin(PluginBase):
                 return {"error": "Translation service not available"}
             
             # Validate target languages
-            for lang in target_languages:
-                if lang not in self.supported_languages:
-                    return {"error": f"Unsupported target language: {lang}"}
+            unsupported = set(target_languages) - self._lang_codes
+            if unsupported:
+                return {"error": f"Unsupported target language: {', '.join(sorted(unsupported))}"}
             
             # Validate source language if provided
-            if source_language and source_language not in self.supported_languages:
+            if source_language and source_language not in self._lang_codes:
                 return {"error": f"Unsupported source language: {source_language}"}
             
-            results = []
+            semaphore = asyncio.Semaphore(TRANSLATION_CONCURRENCY)
+            
+            async def translate_one(text: str, target_lang: str):
+                async with semaphore:
+                    return await self._translate_cached(text, target_lang, source_language)
+            
+            # Translate each distinct (text, language) pair once, concurrently
+            pairs = [(text, target_lang) for text in dict.fromkeys(texts)
+                     for target_lang in dict.fromkeys(target_languages)]
+            translated = await asyncio.gather(
+                *(translate_one(text, target_lang) for text, target_lang in pairs),
+                return_exceptions=True
+            )
+            translations = dict(zip(pairs, translated))
             
-            # Translate each text to each target language
+            results = []
             for text in texts:
                 text_results = []
                 for target_lang in target_languages:
-                    try:
-                        result = await asyncio.to_thread(
-                            self.translator.translate,
-                            text,
-                            dest=target_lang,
-                            src=source_language
-                        )
-                        
-                        text_results.append({
-                            "target_language": target_lang,
-                            "target_language_name": self.supported_languages.get(target_lang, target_lang),
-                            "translated_text": result.text,
-                            "source_language": result.src,
-                            "source_language_name": self.supported_languages.get(result.src, result.src)
-                        })
-                    except Exception as e:
+                    result = translations[(text, target_lang)]
+                    if isinstance(result, Exception):
                         text_results.append({
                             "target_language": target_lang,
-                            "error": str(e)
+                            "error": str(result)
                         })
+                        continue
+                    
+                    text_results.append({
+                        "target_language": target_lang,
+                        "target_language_name": self.supported_languages.get(target_lang, target_lang),
+                        "translated_text": result.text,
+                        "source_language": result.src,
+                        "source_language_name": self.supported_languages.get(result.src, result.src)
+                    })
                 
                 results.append({
                     "original_text": text,
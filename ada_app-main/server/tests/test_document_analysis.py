@@ -0,0 +1,129 @@
+"""
+Document Analysis Plugin tests
+Q&A batching with a real fast tokenizer and a stand-in model
+"""
+
+import asyncio
+import base64
+import io
+import json
+import sys
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+pytest.importorskip("transformers")
+torch = pytest.importorskip("torch")
+
+from transformers import RobertaTokenizerFast
+from transformers.models.roberta.tokenization_roberta import bytes_to_unicode
+
+from plugins.document_analysis import DocumentAnalysisPlugin
+
+@pytest.fixture
+def tokenizer(tmp_path):
+    """Byte-level RoBERTa fast tokenizer built offline, one token per byte"""
+    vocab = {token: i for i, token in enumerate(["<s>", "<pad>", "</s>", "<unk>"])}
+    for char in bytes_to_unicode().values():
+        vocab.setdefault(char, len(vocab))
+    vocab["<mask>"] = len(vocab)
+
+    vocab_file = tmp_path / "vocab.json"
+    merges_file = tmp_path / "merges.txt"
+    vocab_file.write_text(json.dumps(vocab), encoding="utf-8")
+    merges_file.write_text("#version: 0.2\n", encoding="utf-8")
+    return RobertaTokenizerFast(vocab_file=str(vocab_file), merges_file=str(merges_file))
+
+@pytest.fixture
+def plugin(tokenizer, tmp_path, monkeypatch):
+    """Plugin whose Q&A model scores spans from 'w' to 'd' highest"""
+    monkeypatch.chdir(tmp_path)
+    plugin = DocumentAnalysisPlugin()
+    plugin.tokenizer = tokenizer
+
+    start_id = tokenizer.convert_tokens_to_ids("w")
+    end_id = tokenizer.convert_tokens_to_ids("d")
+
+    def qa_model(input_ids, attention_mask):
+        return SimpleNamespace(
+            start_logits=(input_ids == start_id).float() * 10,
+            end_logits=(input_ids == end_id).float() * 10
+        )
+
+    plugin.qa_model = qa_model
+    yield plugin
+    plugin.close()
+
+def test_answer_batch_with_fast_tokenizer(plugin):
+    # The question's 'w' must not be picked: only context tokens are scored
+    requests = [
+        ("who?", plugin._tokenize_context("hello world")),
+        ("what is round?", plugin._tokenize_context("the world is round"))
+    ]
+
+    assert plugin._answer_batch(requests) == ["world", "world"]
+
+def test_answer_batch_searches_every_window(plugin):
+    windows = plugin._tokenize_context("a " * 500 + "hello world")
+    assert len(windows) > 1
+
+    assert plugin._answer_batch([("who?", windows)]) == ["world"]
+
+def test_windows_are_compact_arrays(plugin):
+    windows = plugin._tokenize_context("a " * 500 + "hello world")
+
+    assert all(window.dtype.itemsize == 2 for window in windows)
+    assert plugin._answer_batch([("who?", [window.tolist() for window in windows])]) == ["world"]
+
+def test_tokenizer_shared_across_threads(plugin):
+    # Window tokenization (truncating) and question encoding (not
+    # truncating) from two threads must not collide in the fast tokenizer
+    document = "hello world " * 2000
+    windows = plugin._tokenize_context("hello world")
+    errors = []
+    done = threading.Event()
+
+    def tokenize_documents():
+        try:
+            while not done.is_set():
+                plugin._tokenize_context(document)
+        except Exception as e:
+            errors.append(e)
+
+    worker = threading.Thread(target=tokenize_documents)
+    worker.start()
+    try:
+        for _ in range(50):
+            assert plugin._answer_batch([("who?", windows)]) == ["world"]
+    finally:
+        done.set()
+        worker.join()
+
+    assert not errors
+
+def test_same_bytes_with_another_extension_are_parsed_again(plugin):
+    Image = pytest.importorskip("PIL.Image")
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 64)).save(buffer, format="PNG")
+    data = base64.b64encode(buffer.getvalue()).decode()
+
+    as_text = asyncio.run(plugin._analyze_document(data, "image.txt", "extract"))
+    as_image = asyncio.run(plugin._analyze_document(data, "image.png", "extract"))
+
+    assert as_text["document_id"] != as_image["document_id"]
+    assert plugin.documents[as_text["document_id"]]["has_text"]
+    assert not plugin.documents[as_image["document_id"]]["has_text"]
+    assert as_image["extracted_content"].startswith("Image: PNG")
+
+def test_delete_rejects_paths_outside_cache(plugin, tmp_path):
+    victim = tmp_path / "victim.pkl"
+    victim.write_bytes(b"keep")
+
+    result = asyncio.run(plugin._delete_document("../victim"))
+
+    assert "error" in result
+    assert victim.exists()
@@ -0,0 +1,87 @@
+"""
+QR Fast Path tests
+The encoder and matrix builder must produce the same codes as qrcode
+"""
+
+import importlib
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+np = pytest.importorskip("numpy")
+qrcode = pytest.importorskip("qrcode")
+
+from qrcode import util as qr_util
+
+ERROR_CORRECTION_LEVELS = [
+    qrcode.constants.ERROR_CORRECT_L,
+    qrcode.constants.ERROR_CORRECT_M,
+    qrcode.constants.ERROR_CORRECT_Q,
+    qrcode.constants.ERROR_CORRECT_H
+]
+
+@pytest.fixture(params=["numba", "numpy"])
+def qr_fast(request, monkeypatch):
+    """_qr_fast with its Numba kernels, and with the NumPy fallbacks"""
+    if request.param == "numba":
+        pytest.importorskip("numba")
+        return importlib.import_module("plugins._qr_fast")
+
+    # Re-import without numba; monkeypatch restores the regular module after
+    original = importlib.import_module("plugins._qr_fast")
+    monkeypatch.setattr(sys.modules["plugins"], "_qr_fast", original)
+    monkeypatch.setitem(sys.modules, "numba", None)
+    monkeypatch.delitem(sys.modules, "plugins._qr_fast")
+    module = importlib.import_module("plugins._qr_fast")
+    assert not module.NUMBA_AVAILABLE
+    return module
+
+def random_data(rng: random.Random, lengths) -> str:
+    return "".join(rng.choice("abcXYZ0123456789 :/;é") for _ in range(rng.choice(lengths)))
+
+def test_build_matrix_matches_qrcode(qr_fast):
+    rng = random.Random(1)
+    for _ in range(200):
+        data = random_data(rng, [1, 5, 20, 60, 150, 400, 900])
+        error_correction = rng.choice(ERROR_CORRECTION_LEVELS)
+        mask_pattern = rng.choice([None, None, 0, 3, 7])
+
+        qr = qrcode.QRCode(version=1, error_correction=error_correction, border=0,
+                           mask_pattern=mask_pattern)
+        qr.add_data(data)
+        qr.make(fit=True)
+        expected = np.array(qr.modules, dtype=np.uint8)
+
+        codewords = qr_util.create_data(qr.version, error_correction, qr.data_list)
+        matrix = qr_fast.build_matrix(codewords, qr.version, error_correction, mask_pattern)
+
+        assert np.array_equal(matrix, expected), (data, error_correction, mask_pattern)
+
+def test_lost_point_matches_qrcode(qr_fast):
+    rng = np.random.default_rng(1)
+    for size in [21, 25, 45, 57, 101]:
+        for _ in range(10):
+            matrix = (rng.random((size, size)) > 0.5).astype(np.uint8)
+            assert qr_fast._lost_point_kernel(matrix) == qr_util.lost_point(matrix.astype(bool).tolist())
+
+def test_encode_data_matches_qrcode(qr_fast):
+    rng = random.Random(2)
+    for _ in range(300):
+        data = random_data(rng, [0, 1, 5, 20, 60, 150, 400, 900, 1500, 2500])
+        error_correction = rng.choice(ERROR_CORRECTION_LEVELS)
+
+        qr = qrcode.QRCode(version=1, error_correction=error_correction)
+        qr.add_data(data)
+        try:
+            version = qr.best_fit()
+        except (qrcode.exceptions.DataOverflowError, ValueError):
+            with pytest.raises(qrcode.exceptions.DataOverflowError):
+                qr_fast.encode_data(data, error_correction)
+            continue
+
+        expected = qr_util.create_data(version, error_correction, qr.data_list)
+        assert qr_fast.encode_data(data, error_correction) == (version, expected), (data, error_correction)